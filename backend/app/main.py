@@ -3,14 +3,16 @@ from urllib.request import Request
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, courses, lessons, categories, user, qa, sessions,groups,slides, presentations
+from app.routers import auth, courses, lessons, categories, user, qa, sessions,groups,slides, presentations, static_assets
 from app.configs.db import init_db
+from app.services.browser_pool import browser_pool
 from app.models.user import User
 from app.models.category import Category
 from app.models.course import Course
 from app.models.lesson import Lesson
 from app.models.group import Group
 from app.models.session import Session
+from app.models.generation_job import GenerationJob
 
 
 app = FastAPI(title="AI-Powered E-Learning Platform Backend")
@@ -42,11 +44,24 @@ async def log_requests(request: Request, call_next):
 # Initialize database
 init_db()
 
+@app.on_event("startup")
+def start_browser_pool():
+    try:
+        browser_pool.start()
+    except Exception as e:
+        # Browsers are launched lazily on the first capture instead
+        print(f"Could not warm up the browser pool: {e}")
+
+@app.on_event("shutdown")
+def stop_browser_pool():
+    browser_pool.shutdown()
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(courses.router)
 app.include_router(slides.router)
 app.include_router(presentations.router)
+app.include_router(static_assets.router)
 app.include_router(lessons.router)
 app.include_router(user.router)
 app.include_router(categories.router)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, JSON, Boolean, Text
+from app.configs.db import Base
+from enum import Enum as PyEnum
+from datetime import datetime
+
+class JobStatus(PyEnum):
+    QUEUED = "QUEUED"
+    TTS = "TTS"
+    RENDERING = "RENDERING"
+    ENCODING = "ENCODING"
+    UPLOADING = "UPLOADING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+class GenerationJob(Base):
+    __tablename__ = "generation_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    ai_request_id = Column(String, nullable=False, index=True)
+    language = Column(String, nullable=False)
+    response = Column(JSON, nullable=False)
+    spring_boot_host = Column(String, nullable=False, default="localhost")
+    profile = Column(String, nullable=True)
+    incremental = Column(Boolean, nullable=False, default=False)
+    status = Column(Enum(JobStatus), nullable=False, default=JobStatus.QUEUED, index=True)
+    progress = Column(JSON, nullable=False, default=dict)
+    result = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
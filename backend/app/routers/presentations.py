@@ -1,10 +1,25 @@
-from fastapi import APIRouter, HTTPException, Depends, Header
-from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi import APIRouter, HTTPException, Depends, Header, Request
+from fastapi.responses import HTMLResponse, StreamingResponse, Response
+from sqlalchemy.orm import Session
+from app.configs.db import get_db
 from app.schemas.courseRequest import CourseRequest
+from app.schemas.generation_job import GenerationJobResponse
+from app.services.generation_job_service import submit_job, get_job, cancel_jobs
 from app.services.content_service import send_content, check_and_generate_video, transfer_video
+from app.services.encoding_profiles import ENCODING_PROFILES
+from app.services.file_cache import caches
+from app.services.model_response_cache import model_response_cache
+from app.services.streaming_service import stream_and_generate_video
+from app.services.hls import hls_dir
+from app.services.presentation_files import file_response
+from app.services.memory_cache import memory_caches, served_files, read_json
+from app.services.compressed_assets import compressed_response
+from app.services.generation_events import stream_events
+from app.services.generation_control import GenerationCancelled, request_cancel
 import os
 import json
 import logging
+from typing import Optional
 from uuid import UUID
 
 
@@ -21,13 +36,14 @@ async def verify_api_key(x_api_key: str = Header(...)):
     logger.debug("API key validated successfully")
 
 @router.get("/api/presentations/{session_id}/slides")
-async def get_slides_data(session_id: str):
+async def get_slides_data(session_id: str, request: Request, response: Response):
     try:
         slides_file_path = f"presentations/{session_id}/slides.json"
-        if not os.path.exists(slides_file_path):
-            raise HTTPException(status_code=404, detail="Slides data not found")
-        with open(slides_file_path, 'r', encoding='utf-8') as file:
-            slides_data = json.load(file)
+        compressed = compressed_response(request, slides_file_path, "application/json")
+        if compressed:
+            return compressed
+        response.headers["Vary"] = "Accept-Encoding"
+        slides_data = served_files.get(slides_file_path, read_json)
         return {"slides": slides_data}
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Slides data file not found")
@@ -37,49 +53,110 @@ async def get_slides_data(session_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/api/presentations/{session_id}/slide/{slide_number}", response_class=HTMLResponse)
-async def get_slide_html(session_id: str, slide_number: int):
+async def get_slide_html(session_id: str, slide_number: int, request: Request):
     try:
         html_file_path = f"presentations/{session_id}/slides/slide{slide_number}.html"
-        if not os.path.exists(html_file_path):
-            raise HTTPException(status_code=404, detail="Slide not found")
-        with open(html_file_path, 'r', encoding='utf-8') as file:
-            html_content = file.read()
-        return HTMLResponse(content=html_content)
+        compressed = compressed_response(request, html_file_path, "text/html")
+        if compressed:
+            return compressed
+        html_content = served_files.get(html_file_path)
+        return HTMLResponse(content=html_content, headers={"Vary": "Accept-Encoding"})
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Slide not found")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/api/presentations/{session_id}/audio/{slide_number}")
-async def get_audio(session_id: str, slide_number: int):
-    def generate():
-        with open(f"presentations/{session_id}/audios/audio{slide_number}.mp3", "rb") as audio_file:
-            yield from audio_file
-    return StreamingResponse(
-        generate(),
-        media_type="audio/mpeg",
-        headers={
-            "Accept-Ranges": "bytes",
-            "Cache-Control": "public, max-age=3600"
-        }
-    )
+async def get_audio(session_id: str, slide_number: int, request: Request):
+    return file_response(request, f"presentations/{session_id}/audios/audio{slide_number}.mp3", "audio/mpeg")
+
+@router.api_route("/api/presentations/{ai_request_id}/video", methods=["GET", "HEAD"])
+async def get_video(ai_request_id: UUID, request: Request):
+    # A regenerated course keeps its URL, so players revalidate (cheaply, through the ETag) every time
+    return file_response(request, f"presentations/{ai_request_id}/{ai_request_id}.mp4", "video/mp4", "no-cache")
+
+HLS_MEDIA_TYPES = {".m3u8": "application/vnd.apple.mpegurl", ".ts": "video/mp2t"}
+
+@router.get("/api/presentations/{ai_request_id}/hls/{file_name}")
+async def get_hls_file(ai_request_id: UUID, file_name: str, request: Request):
+    extension = os.path.splitext(file_name)[1]
+    if extension not in HLS_MEDIA_TYPES or os.path.basename(file_name) != file_name:
+        raise HTTPException(status_code=404, detail="HLS file not found")
+    # The playlist keeps growing while the course renders, and segment names are reused by every regeneration;
+    # validators still let clients skip downloading an unchanged segment again
+    return file_response(request, os.path.join(hls_dir(ai_request_id), file_name), HLS_MEDIA_TYPES[extension],
+                         "no-cache")
+
+@router.get("/api/presentations/cache/stats")
+async def get_cache_stats(x_api_key: str = Depends(verify_api_key)):
+    return {name: cache.stats() for name, cache in {**caches, **memory_caches}.items()}
+
+@router.delete("/api/presentations/cache/model-responses")
+async def invalidate_model_responses(payload: Optional[CourseRequest] = None, x_api_key: str = Depends(verify_api_key)):
+    removed = model_response_cache.invalidate(payload)
+    logger.info(f"Invalidated {removed} cached model responses")
+    return {"message": "Model response cache invalidated", "removed": removed}
 
 @router.post("/api/presentations/{ai_request_id}/generate/start")
-async def send_to_model(ai_request_id: UUID, payload: CourseRequest, model_api_host: str = "localhost", x_api_key: str = Depends(verify_api_key)):
+async def send_to_model(ai_request_id: UUID, payload: CourseRequest, model_api_host: str = "localhost", refresh: bool = False, x_api_key: str = Depends(verify_api_key)):
     try:
         logger.info(f"Initiating video generation for ai_request_id: {ai_request_id}")
-        response = await send_content(payload, ai_request_id, model_api_host)
+        response = await send_content(payload, ai_request_id, model_api_host, refresh)
         return {"message": "Video generation initiated successfully", "ai_request_id": str(ai_request_id), "response": response}
     except Exception as e:
         logger.error(f"Error initiating video generation for ai_request_id {ai_request_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error initiating video generation: {str(e)}")
 
 @router.post("/api/presentations/{ai_request_id}/{language}/generate/process")
-async def process_content(ai_request_id: UUID, language: str, response: dict, spring_boot_host: str = "localhost"):
+async def process_content(ai_request_id: UUID, language: str, response: dict, spring_boot_host: str = "localhost", profile: str = None, incremental: bool = False):
+    if profile and profile not in ENCODING_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown encoding profile: {profile}")
     try:
-        result = await check_and_generate_video(ai_request_id, language, response, spring_boot_host)
+        result = await check_and_generate_video(ai_request_id, language, response, spring_boot_host, profile, incremental)
         return {"message": "Video processed and sent to Spring Boot successfully", "result": result}
+    except GenerationCancelled as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/api/presentations/{ai_request_id}/generate/stream")
+async def stream_content(ai_request_id: UUID, payload: CourseRequest, model_api_host: str = "localhost", spring_boot_host: str = "localhost", profile: str = None, x_api_key: str = Depends(verify_api_key)):
+    if profile and profile not in ENCODING_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown encoding profile: {profile}")
+    try:
+        result = await stream_and_generate_video(ai_request_id, payload, model_api_host, spring_boot_host, profile)
+        return {"message": "Video streamed, processed and sent to Spring Boot successfully", "result": result}
+    except GenerationCancelled as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
+        logger.error(f"Error streaming video generation for ai_request_id {ai_request_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/api/presentations/{ai_request_id}/{language}/generate/jobs", response_model=GenerationJobResponse)
+def queue_content(ai_request_id: UUID, language: str, response: dict, spring_boot_host: str = "localhost", profile: str = None, incremental: bool = False, db: Session = Depends(get_db)):
+    if profile and profile not in ENCODING_PROFILES:
+        raise HTTPException(status_code=400, detail=f"Unknown encoding profile: {profile}")
+    return submit_job(db, ai_request_id, language, response, spring_boot_host, profile, incremental)
+
+@router.get("/api/presentations/jobs/{job_id}", response_model=GenerationJobResponse)
+def get_generation_job(job_id: int, db: Session = Depends(get_db)):
+    return get_job(db, job_id)
+
+@router.post("/api/presentations/{ai_request_id}/cancel")
+def cancel_generation(ai_request_id: UUID, db: Session = Depends(get_db), x_api_key: str = Depends(verify_api_key)):
+    jobs_cancelled = cancel_jobs(db, ai_request_id)
+    report = request_cancel(ai_request_id)
+    logger.info(f"Cancelled generation for ai_request_id: {ai_request_id}")
+    return {"message": "Generation cancelled", "ai_request_id": str(ai_request_id), "jobs_cancelled": jobs_cancelled, **report}
+
+@router.get("/api/presentations/{ai_request_id}/events")
+async def get_generation_events(ai_request_id: UUID, request: Request):
+    return StreamingResponse(
+        stream_events(ai_request_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/api/presentations/{ai_request_id}/test-transfer")
 async def test_video_transfer(ai_request_id: UUID, spring_boot_host: str = "localhost", x_api_key: str = Depends(verify_api_key)):
     try:
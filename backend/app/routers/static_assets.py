@@ -0,0 +1,19 @@
+import mimetypes
+from fastapi import APIRouter, HTTPException, Request
+from app.services.presentation_files import file_response
+from app.services.slide_templates import ASSET_ROUTE, is_current_asset, resolve_asset
+
+router = APIRouter(tags=["static"])
+
+
+@router.api_route(ASSET_ROUTE + "/{name}", methods=["GET", "HEAD"])
+async def get_slide_asset(name: str, request: Request):
+    path = resolve_asset(name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    if is_current_asset(name):
+        # The name carries the file's content hash, so this URL never changes and can be cached forever
+        return file_response(request, path, media_type, "public, max-age=31536000, immutable")
+    # An older fingerprint linked by previously generated slides gets the current file, revalidated each time
+    return file_response(request, path, media_type, "no-cache")
@@ -0,0 +1,37 @@
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, Dict, Any
+from datetime import datetime
+from enum import Enum
+
+class JobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    TTS = "TTS"
+    RENDERING = "RENDERING"
+    ENCODING = "ENCODING"
+    UPLOADING = "UPLOADING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+class GenerationJobResponse(BaseModel):
+    id: int
+    ai_request_id: str
+    language: str
+    status: JobStatus
+    progress: Dict[str, Any] = Field(default_factory=dict, description="Last completed step per slide")
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    attempts: int
+    created_at: datetime
+    updated_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    @field_validator('status', mode='before')
+    @classmethod
+    def convert_status(cls, v):
+        # The ORM column holds the model-side enum; validate on its value
+        return getattr(v, "value", v)
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,194 @@
+import os
+import time
+import queue
+import threading
+import logging
+from contextlib import contextmanager
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException, TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "100"))
+BROWSER_CHECKOUT_TIMEOUT = float(os.getenv("BROWSER_CHECKOUT_TIMEOUT", "300"))
+SLIDE_READY_TIMEOUT = float(os.getenv("SLIDE_READY_TIMEOUT", "10"))
+VIEWPORT = (1920, 1080)
+# How often a blocked checkout retries launching, in case a discarded browser freed a slot
+CHECKOUT_POLL_SECONDS = 0.5
+
+# Pages that still work after load can set <html data-slide-ready> and flip it to "true"
+# when done; pages without the attribute (slides, highlighted server-side) only wait for load.
+PAGE_READY_SCRIPT = """
+var state = document.documentElement.getAttribute('data-slide-ready');
+return document.readyState === 'complete'
+    && (!document.fonts || document.fonts.status === 'loaded')
+    && (state === null || state === 'true');
+"""
+
+logger = logging.getLogger(__name__)
+
+
+def chrome_options():
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument(f'--window-size={VIEWPORT[0]},{VIEWPORT[1]}')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--disable-software-rasterizer')
+    options.add_argument('--disable-background-timer-throttling')
+    options.add_argument('--disable-renderer-backgrounding')
+    options.add_argument('--disable-backgrounding-occluded-windows')
+    return options
+
+
+class PooledBrowser:
+    """A warm headless Chrome instance leased from the pool."""
+
+    def __init__(self, max_pages: int):
+        self.max_pages = max_pages
+        self.pages = 0
+        self.driver = None
+        self.launch()
+
+    def launch(self):
+        self.driver = webdriver.Chrome(options=chrome_options())
+        self.driver.set_window_size(*VIEWPORT)
+        self.pages = 0
+        logger.info("Headless browser started")
+
+    def quit(self):
+        if self.driver:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logger.warning(f"Error while stopping browser: {e}")
+            self.driver = None
+
+    def recycle(self):
+        logger.info(f"Recycling browser after {self.pages} pages")
+        self.quit()
+        self.launch()
+
+    def is_alive(self) -> bool:
+        try:
+            return self.driver is not None and bool(self.driver.window_handles)
+        except WebDriverException:
+            return False
+
+    def open(self, url: str):
+        if self.pages >= self.max_pages:
+            self.recycle()
+        self.pages += 1
+        self.driver.get(url)
+
+    def wait_until_ready(self, timeout: float = SLIDE_READY_TIMEOUT) -> bool:
+        try:
+            WebDriverWait(self.driver, timeout, poll_frequency=0.05).until(
+                lambda driver: driver.execute_script(PAGE_READY_SCRIPT)
+            )
+            return True
+        except TimeoutException:
+            logger.warning(f"Page not ready after {timeout}s, capturing anyway: {self.driver.current_url}")
+            return False
+
+
+class BrowserPool:
+    """Bounded pool of long-lived headless browsers shared by slide captures."""
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, max_pages: int = BROWSER_MAX_PAGES):
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._live = 0
+        self._closed = False
+
+    def start(self):
+        """Launch browsers up to the pool size so the first captures find them warm."""
+        self._closed = False
+        warm = []
+        while True:
+            browser = self._try_launch()
+            if browser is None:
+                break
+            warm.append(browser)
+        for browser in warm:
+            self._idle.put(browser)
+        logger.info(f"Browser pool started with {self._live} browsers")
+
+    def shutdown(self):
+        self._closed = True
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(browser)
+        logger.info("Browser pool stopped")
+
+    def _try_launch(self):
+        with self._lock:
+            if self._live >= self.size:
+                return None
+            self._live += 1
+        try:
+            return PooledBrowser(self.max_pages)
+        except Exception:
+            with self._lock:
+                self._live -= 1
+            raise
+
+    def _discard(self, browser: PooledBrowser):
+        browser.quit()
+        with self._lock:
+            self._live -= 1
+
+    def acquire(self) -> PooledBrowser:
+        deadline = time.monotonic() + BROWSER_CHECKOUT_TIMEOUT
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except queue.Empty:
+                browser = self._try_launch()
+            if browser is not None:
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(f"No browser available after {BROWSER_CHECKOUT_TIMEOUT}s")
+            # Crashed browsers are discarded rather than returned, so waiting on the queue alone could miss a free slot
+            try:
+                browser = self._idle.get(timeout=min(remaining, CHECKOUT_POLL_SECONDS))
+                break
+            except queue.Empty:
+                continue
+        if not browser.is_alive():
+            logger.warning("Pooled browser is not responding, restarting it")
+            browser.quit()
+            try:
+                browser.launch()
+            except Exception:
+                self._discard(browser)
+                raise
+        return browser
+
+    def release(self, browser: PooledBrowser, broken: bool = False):
+        if broken or self._closed:
+            self._discard(browser)
+            return
+        self._idle.put(browser)
+
+    @contextmanager
+    def browser(self):
+        browser = self.acquire()
+        broken = False
+        try:
+            yield browser
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self.release(browser, broken)
+
+
+browser_pool = BrowserPool()
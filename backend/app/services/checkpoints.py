@@ -0,0 +1,50 @@
+import os
+import json
+import threading
+import logging
+from uuid import UUID
+
+logger = logging.getLogger(__name__)
+
+
+class ClipManifest:
+    """Per-presentation record of finished slide clips, so a retried render resumes where it stopped."""
+
+    def __init__(self, ai_request_id: UUID):
+        self.directory = f"presentations/{ai_request_id}/clips"
+        self.path = os.path.join(self.directory, "manifest.json")
+        self._lock = threading.Lock()
+        self.slides = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.slides = json.load(f).get("slides", {})
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable clip manifest {self.path}: {e}")
+
+    def clip_path(self, slide: int) -> str:
+        return os.path.join(self.directory, f"slide{slide}.mp4")
+
+    def partial_path(self, slide: int) -> str:
+        return os.path.join(self.directory, f"slide{slide}.part.mp4")
+
+    def is_complete(self, slide: int, fingerprint: str) -> bool:
+        entry = self.slides.get(str(slide))
+        return bool(entry) and entry["fingerprint"] == fingerprint and os.path.exists(self.clip_path(slide))
+
+    def commit(self, slide: int, fingerprint: str):
+        """Atomically promote the partial clip and checkpoint it."""
+        os.replace(self.partial_path(slide), self.clip_path(slide))
+        with self._lock:
+            self.slides[str(slide)] = {"fingerprint": fingerprint}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"slides": self.slides}, f)
+            os.replace(tmp_path, self.path)
+
+    def remove_partials(self):
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".part.mp4"):
+                os.remove(os.path.join(self.directory, name))
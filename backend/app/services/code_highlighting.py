@@ -0,0 +1,76 @@
+"""Server-side highlighting of slide code examples with Pygments.
+
+    python -m app.services.code_highlighting css <pygments style>
+
+prints the token rules a theme stylesheet needs for that style.
+"""
+import os
+import re
+import sys
+import html
+import logging
+from functools import lru_cache
+from pygments import highlight
+from pygments.formatters import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+from pygments.lexers.special import TextLexer
+from pygments.util import ClassNotFound
+
+HIGHLIGHT_CACHE_SIZE = int(os.getenv("HIGHLIGHT_CACHE_SIZE", "1024"))
+CSS_SCOPE = ".code-content .highlight"
+
+# Model output wraps examples as <pre><code class="language-java">...</code></pre>, HTML-escaped
+CODE_BLOCK = re.compile(r"<pre[^>]*>\s*<code(?P<attrs>[^>]*)>(?P<code>.*?)</code>\s*</pre>", re.DOTALL | re.IGNORECASE)
+LANGUAGE_CLASS = re.compile(r"\blang(?:uage)?-(?P<language>[\w+#.-]+)")
+
+# Keep the snippet's leading and trailing whitespace as written
+LEXER_OPTIONS = {"stripnl": False, "ensurenl": False}
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def lexer_for(language: str):
+    if not language:
+        return TextLexer(**LEXER_OPTIONS)
+    try:
+        return get_lexer_by_name(language, **LEXER_OPTIONS)
+    except ClassNotFound:
+        logger.warning(f"No Pygments lexer for language {language!r}, leaving its code unhighlighted")
+        return TextLexer(**LEXER_OPTIONS)
+
+
+@lru_cache(maxsize=None)
+def formatter():
+    # Token classes only; colours come from the theme stylesheet, so every theme shares the markup
+    return HtmlFormatter(nowrap=True)
+
+
+def _highlight_block(match) -> str:
+    language_match = LANGUAGE_CLASS.search(match["attrs"])
+    language = language_match["language"].lower() if language_match else ""
+    code = html.unescape(match["code"])
+    highlighted = highlight(code, lexer_for(language), formatter())
+    if not code.endswith("\n"):
+        # The formatter terminates every line, including the last
+        highlighted = highlighted.removesuffix("\n")
+    language_attr = f' class="language-{html.escape(language)}"' if language else ""
+    return f'<pre class="highlight"><code{language_attr}>{highlighted}</code></pre>'
+
+
+@lru_cache(maxsize=HIGHLIGHT_CACHE_SIZE)
+def highlight_code(example_code: str) -> str:
+    """example_code with every <pre><code> block replaced by its highlighted markup."""
+    return CODE_BLOCK.sub(_highlight_block, example_code)
+
+
+def token_css(style: str) -> str:
+    rules = HtmlFormatter(style=style).get_token_style_defs(CSS_SCOPE)
+    return "\n".join(rules)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] != "css":
+        print(__doc__)
+        sys.exit(1)
+    print(token_css(sys.argv[2]))
@@ -0,0 +1,117 @@
+import os
+import gzip
+import logging
+from pathlib import Path
+from fastapi import Request
+from fastapi.responses import Response
+from app.services.memory_cache import served_files, read_bytes
+
+try:
+    import brotli
+except ImportError:  # In requirements; a trimmed install without it only writes gzip variants
+    brotli = None
+
+COMPRESSED_DIR = "compressed"
+# Preferred first when the client accepts both equally
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+logger = logging.getLogger(__name__)
+
+
+def variant_path(path: str, suffix: str) -> str:
+    """presentations/{id}/slides/slide1.html -> presentations/{id}/compressed/slides/slide1.html.gz"""
+    parts = Path(path).parts
+    return str(Path(parts[0], parts[1], COMPRESSED_DIR, *parts[2:])) + suffix
+
+
+def _compress(encoding: str, body: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=11)
+    return gzip.compress(body, compresslevel=9, mtime=0)
+
+
+def write_variants(path: str, body: bytes = None):
+    """Write the compressed variants of a generated file (or of the response body built from it)."""
+    if body is None:
+        with open(path, 'rb') as f:
+            body = f.read()
+    for encoding, suffix in ENCODINGS:
+        if encoding == "br" and brotli is None:
+            continue
+        target = variant_path(path, suffix)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(_compress(encoding, body))
+        os.replace(tmp_path, target)
+        served_files.invalidate(target)
+
+
+def slides_manifest_body(raw: bytes) -> bytes:
+    """The body get_slides_data answers with, built from slides.json without parsing it."""
+    return b'{"slides":' + raw.strip() + b'}'
+
+
+def write_manifest_variants(ai_request_id):
+    path = f"presentations/{ai_request_id}/slides.json"
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        write_variants(path, slides_manifest_body(f.read()))
+
+
+def accepted_encodings(header: str) -> dict:
+    accepted = {}
+    for item in (header or "").split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    return accepted
+
+
+def best_variant(path: str, accept_encoding: str):
+    """(encoding, variant path) of the best up-to-date variant the client accepts, or None."""
+    accepted = accepted_encodings(accept_encoding)
+    try:
+        source_mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    candidates = []
+    for rank, (encoding, suffix) in enumerate(ENCODINGS):
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality <= 0:
+            continue
+        target = variant_path(path, suffix)
+        try:
+            # A variant older than its source belongs to a previous generation
+            if os.stat(target).st_mtime_ns < source_mtime:
+                continue
+        except FileNotFoundError:
+            continue
+        candidates.append((-quality, rank, encoding, target))
+    if not candidates:
+        return None
+    _, _, encoding, target = min(candidates)
+    return encoding, target
+
+
+def compressed_response(request: Request, path: str, media_type: str):
+    """A precompressed response for path, or None when the client or the variants don't allow one."""
+    variant = best_variant(path, request.headers.get("accept-encoding"))
+    if variant is None:
+        return None
+    encoding, target = variant
+    try:
+        body = served_files.get(target, read_bytes)
+    except FileNotFoundError:
+        return None
+    return Response(content=body, media_type=media_type,
+                    headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"})
@@ -1,29 +1,80 @@
 from fastapi import HTTPException, Depends, Header
+import asyncio
 import json
 from pathlib import Path
 import subprocess
 import edge_tts
 import os
+import unicodedata
 import httpx
-from selenium import webdriver
 from PIL import Image
-import time
 from app.schemas.courseRequest import CourseRequest
+from app.services.browser_pool import browser_pool, PooledBrowser, VIEWPORT
+from app.services.encoding_profiles import EncodingProfile, get_encoding_profile
+from app.services.file_cache import ContentCache, file_digest, remove_stale
+from app.services.generation_events import EventRecorder, combine_progress
+from app.services.checkpoints import ClipManifest
+from app.services.single_flight import single_flight
+from app.services.compressed_assets import write_manifest_variants
+from app.services.slide_templates import capture_copy, render_slide, write_slide_files
+from app.services.hls import VIDEO_HLS, HlsPlaylist
+from app.services.model_response_cache import MODEL_CACHE_ENABLED, model_response_cache, clone_presentation
+from app.services.generation_control import (
+    CancelWatcher, GenerationCancelled, cancel_requested, check_cancelled, run_process, track_child
+)
 from uuid import UUID
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 import logging
 
 API_KEY = os.getenv("API_KEY")
+VIDEO_PARALLEL = os.getenv("VIDEO_PARALLEL", "true").lower() == "true"
+VIDEO_WORKERS = int(os.getenv("VIDEO_WORKERS", "0"))
+FFMPEG_THREADS = int(os.getenv("FFMPEG_THREADS", "2"))
+VIDEO_ASSEMBLY = os.getenv("VIDEO_ASSEMBLY", "concat")
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", "8"))
+TTS_PER_VOICE_LIMIT = int(os.getenv("TTS_PER_VOICE_LIMIT", "4"))
+TTS_MAX_RETRIES = int(os.getenv("TTS_MAX_RETRIES", "3"))
+TTS_RETRY_BACKOFF = float(os.getenv("TTS_RETRY_BACKOFF", "1.0"))
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "1024"))
+SLIDE_CACHE_MAX_MB = int(os.getenv("SLIDE_CACHE_MAX_MB", "1024"))
+CLIP_CACHE_ENABLED = os.getenv("CLIP_CACHE_ENABLED", "false").lower() == "true"
+CLIP_CACHE_MAX_MB = int(os.getenv("CLIP_CACHE_MAX_MB", "2048"))
+RENDER_JOBS = int(os.getenv("RENDER_JOBS", "2"))
+STAGE_OVERLAP = os.getenv("STAGE_OVERLAP", "true").lower() == "true"
+
+TTS_VOICES = {
+    "en": "en-US-AriaNeural",
+    "fr": "fr-FR-DeniseNeural",
+    "es": "es-ES-ElviraNeural",
+    "it": "it-IT-ElsaNeural",
+}
 
 logger = logging.getLogger(__name__)
 
+tts_semaphore = asyncio.Semaphore(TTS_CONCURRENCY)
+voice_semaphores = {}
+tts_cache = ContentCache("tts", TTS_CACHE_MAX_MB * 1024 * 1024, ".mp3")
+slide_cache = ContentCache("slides", SLIDE_CACHE_MAX_MB * 1024 * 1024, ".png")
+clip_cache = ContentCache("clips", CLIP_CACHE_MAX_MB * 1024 * 1024, ".mp4")
+# Selenium and ffmpeg block for minutes; they run here so the event loop keeps serving requests
+render_executor = ThreadPoolExecutor(max_workers=RENDER_JOBS, thread_name_prefix="course-render")
+# Same bound for courses rendered with overlapping stages, which drive their own slide threads
+render_slots = asyncio.Semaphore(RENDER_JOBS)
+
 async def verify_api_key(x_api_key: str = Header(...)):
     if x_api_key != API_KEY:
         logger.error("Invalid or missing API key")
         raise HTTPException(status_code=401, detail="Invalid or missing API key")
     logger.debug("API key validated successfully")
 
-async def send_content(payload: CourseRequest, ai_request_id: UUID, model_api_host: str = "localhost", x_api_key: str = Depends(verify_api_key)):
+async def send_content(payload: CourseRequest, ai_request_id: UUID, model_api_host: str = "localhost", refresh: bool = False, x_api_key: str = Depends(verify_api_key)):
     logger.info(f"Initiating content generation with payload: {payload}")
+    cached = model_response_cache.lookup(payload) if MODEL_CACHE_ENABLED and not refresh else None
+    if cached:
+        logger.info(f"Reusing the model response generated for ai_request_id: {cached['ai_request_id']}")
+        await asyncio.to_thread(clone_presentation, cached["ai_request_id"], ai_request_id)
+        return cached["response"]
     async with httpx.AsyncClient() as client:
         print(f"Sending request to model API for ai_request_id: {ai_request_id}")
         model_response = await client.post(
@@ -35,10 +86,25 @@ async def send_content(payload: CourseRequest, ai_request_id: UUID, model_api_ho
             raise Exception(f"Model API failed: {model_response.text}")
         response_data = model_response.json()
         print(f"Model API response: {response_data}")
+        if MODEL_CACHE_ENABLED:
+            model_response_cache.store(payload, ai_request_id, response_data)
         return response_data
 
 
-async def generate_content(ai_request_id: UUID, language: str, response: dict):
+def report_progress(progress, stage: str, slide=None, step: str = None):
+    """Forward a pipeline stage or per-slide step to the caller's progress hook, if any."""
+    if progress is None:
+        return
+    try:
+        progress(stage, slide, step)
+    except Exception as e:
+        logger.warning(f"Progress hook failed for {stage}/{slide}/{step}: {e}")
+
+async def run_blocking(func, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(render_executor, partial(func, *args, **kwargs))
+
+async def generate_content(ai_request_id: UUID, language: str, response: dict, profile: str = None, progress=None):
     logger.info(f"Generating content for ai_request_id: {ai_request_id}")
     course_path = Path(f"presentations/{ai_request_id}")
     course_path.mkdir(parents=True, exist_ok=True)
@@ -47,33 +113,210 @@ async def generate_content(ai_request_id: UUID, language: str, response: dict):
     logger.info(f"Received model response: {response}")
 
     logger.info("Generating slides...")
-    slides = await generate_slides(response.get('slides', []), str(course_path / "slides"))
+    check_cancelled(ai_request_id)
+    report_progress(progress, "slides")
+    slides = await generate_slides(response.get('slides', []), str(course_path / "slides"), progress)
     logger.info(f"Generated slides: {slides}")
 
-    logger.info("Creating audio...")
-    audio_files = await create_audio(response.get('speech', []), language, str(course_path / "audios"))
-    logger.info(f"Created audio files: {audio_files}")
+    slide_numbers = sorted_slide_ids(slide["slide_id"] for slide in slides)
+
+    if STAGE_OVERLAP:
+        logger.info("Creating audio while capturing slides...")
+        check_cancelled(ai_request_id)
+        report_progress(progress, "tts")
+        audio_tasks = start_audio(response.get('speech', []), language, str(course_path / "audios"), progress)
+        try:
+            video_path = await generate_video_overlapped(slide_numbers, ai_request_id, audio_tasks, profile=profile,
+                                                         progress=progress)
+        except BaseException:
+            for task in audio_tasks.values():
+                task.cancel()
+            raise
+        audio_files = await collect_audio(audio_tasks)
+        logger.info(f"Created audio files: {audio_files}")
+        logger.info(f"Video generated: {video_path}")
+    else:
+        logger.info("Creating audio...")
+        check_cancelled(ai_request_id)
+        report_progress(progress, "tts")
+        audio_files = await create_audio(response.get('speech', []), language, str(course_path / "audios"), progress)
+        logger.info(f"Created audio files: {audio_files}")
+
+        logger.info("Generating video...")
+        check_cancelled(ai_request_id)
+        report_progress(progress, "rendering")
+        video_path = await run_blocking(generate_video, slide_numbers, ai_request_id, profile=profile,
+                                        progress=progress)
+        logger.info(f"Video generated: {video_path}")
+
+    save_model_response(ai_request_id, language, response)
+    write_manifest_variants(ai_request_id)
 
-    count = count_slides(slides)
+    return {
+        "slides": slides,
+        "audio_files": audio_files,
+        "video": video_path
+    }
 
-    logger.info("Generating video...")
-    video_path = generate_video(count, ai_request_id)
-    logger.info(f"Video generated: {video_path}")
+def save_model_response(ai_request_id: UUID, language: str, response: dict):
+    with open(f"presentations/{ai_request_id}/model_response.json", 'w', encoding='utf-8') as f:
+        json.dump({"language": language, "response": response}, f, ensure_ascii=False)
+
+def load_model_response(ai_request_id: UUID):
+    path = f"presentations/{ai_request_id}/model_response.json"
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def normalize_slide_id(slide_id):
+    """Model output numbers slides and speech as ints or numeric strings; compare them as ints."""
+    text = str(slide_id).strip()
+    return int(text) if text.isdigit() else text
+
+def sorted_slide_ids(slide_ids) -> list:
+    return sorted({normalize_slide_id(i) for i in slide_ids}, key=lambda i: (isinstance(i, str), i))
+
+def resolve_slide_numbers(slides) -> list:
+    """Slide ids to render, from a slide count (slides 1..n) or the ids themselves."""
+    if isinstance(slides, int):
+        return list(range(1, slides + 1))
+    return sorted_slide_ids(slides)
+
+def _by_id(items) -> dict:
+    if isinstance(items, str):
+        items = json.loads(items)
+    return {normalize_slide_id(item["id"]): item for item in items or [] if item.get("id") is not None}
+
+def diff_model_response(previous: dict, response: dict, same_language: bool = True) -> dict:
+    old_slides, new_slides = _by_id(previous.get('slides')), _by_id(response.get('slides'))
+    old_speech, new_speech = _by_id(previous.get('speech')), _by_id(response.get('speech'))
+    html = {i for i, slide in new_slides.items() if old_slides.get(i) != slide}
+    audio = {i for i, speech in new_speech.items() if not same_language or old_speech.get(i) != speech}
+    removed = (set(old_slides) - set(new_slides)) | (set(old_speech) - set(new_speech))
+    return {"html": html, "audio": audio, "removed": removed}
+
+async def regenerate_content(ai_request_id: UUID, language: str, response: dict, previous: dict, profile: str = None,
+                             progress=None):
+    """Rebuild only the slides whose content or script changed since the stored model response."""
+    course_path = Path(f"presentations/{ai_request_id}")
+    changes = diff_model_response(previous["response"], response, previous.get("language") == language)
+    logger.info(f"Incremental regeneration for {ai_request_id}: {changes}")
+
+    for slide_id in changes["removed"]:
+        for stale in (course_path / "slides" / f"slide{slide_id}.html",
+                      course_path / "audios" / f"audio{slide_id}.mp3",
+                      course_path / "clips" / f"slide{slide_id}.mp4"):
+            if stale.exists():
+                stale.unlink()
+
+    new_slides = _by_id(response.get('slides'))
+    new_speech = _by_id(response.get('speech'))
+    report_progress(progress, "slides")
+    slides = await generate_slides([new_slides[i] for i in sorted_slide_ids(changes["html"])],
+                                   str(course_path / "slides"), progress)
+    report_progress(progress, "tts")
+    audio_files = await create_audio([new_speech[i] for i in sorted_slide_ids(changes["audio"])], language,
+                                     str(course_path / "audios"), progress)
+
+    unchanged = set(new_slides) - changes["html"] - changes["audio"] - changes["removed"]
+    check_cancelled(ai_request_id)
+    report_progress(progress, "rendering")
+    # Unchanged slides keep their clips through the manifest, whose fingerprint also covers the profile
+    video_path = await run_blocking(generate_video, sorted_slide_ids(new_slides), ai_request_id, profile=profile,
+                                    progress=progress)
+    save_model_response(ai_request_id, language, response)
+    write_manifest_variants(ai_request_id)
 
     return {
         "slides": slides,
         "audio_files": audio_files,
-        "video": video_path
+        "video": video_path,
+        "reused_slides": sorted_slide_ids(unchanged)
     }
 
-async def check_and_generate_video(ai_request_id: UUID, language: str, response: dict, spring_boot_host: str = "localhost", x_api_key: str = Depends(verify_api_key)):
+async def produce_slide_clip(ai_request_id: UUID, slide: dict, speech: dict, language: str, profile: EncodingProfile,
+                             manifest: ClipManifest, executor: ThreadPoolExecutor, progress=None, failures: list = None):
+    """Take a single slide from model output to a finished clip: HTML, then TTS, then capture and encode.
+
+    Capture and encode run on executor, the course's own slide threads.
+    A slide whose audio could not be synthesised is appended to failures and left out (returns None).
+    """
+    course_path = Path(f"presentations/{ai_request_id}")
+    loop = asyncio.get_running_loop()
+    check_cancelled(ai_request_id)
+    await generate_slides([slide], str(course_path / "slides"), progress)
+    # The screenshot does not need the audio, so it is taken while the script is synthesised
+    capture = loop.run_in_executor(executor, capture_slide_frame, slide["id"], ai_request_id, None, progress)
+    try:
+        audio_files = await create_audio([speech], language, str(course_path / "audios"), progress)
+    finally:
+        image = await capture
+    if failures is not None:
+        failures.extend(failed_slides(audio_files))
+    if image is None:
+        return None
+    return await loop.run_in_executor(executor, finish_slide_clip, slide["id"], ai_request_id, image, profile, manifest,
+                                      progress)
+
+async def check_and_generate_video(ai_request_id: UUID, language: str, response: dict, spring_boot_host: str = "localhost", profile: str = None, incremental: bool = False, progress=None, x_api_key: str = Depends(verify_api_key)):
+    run = partial(_generate_and_upload, ai_request_id, language, response, spring_boot_host, profile, incremental)
+    # Concurrent requests for the same presentation share one run instead of overwriting each other's files
+    return await single_flight(ai_request_id, partial(run_with_events, ai_request_id, run, progress))
+
+async def run_with_events(ai_request_id: UUID, run, progress=None):
+    """Run run(progress) under an event log and cancel watcher, recording how it ended."""
+    events = EventRecorder(ai_request_id)
+    try:
+        with CancelWatcher(ai_request_id):
+            try:
+                result = await run(combine_progress(events, progress))
+            except Exception as e:
+                # A killed ffmpeg or browser surfaces as its own error; report it as the cancel it is
+                if not isinstance(e, GenerationCancelled) and cancel_requested(ai_request_id):
+                    raise GenerationCancelled(f"Generation cancelled for ai_request_id: {ai_request_id}") from e
+                raise
+    except GenerationCancelled as e:
+        events.emit("cancelled", error=str(e))
+        raise
+    except Exception as e:
+        events.emit("failed", error=str(e))
+        raise
+    events.emit("done", **result)
+    return result
+
+async def _generate_and_upload(ai_request_id: UUID, language: str, response: dict, spring_boot_host: str, profile: str,
+                               incremental: bool, progress):
     video_path = f"presentations/{ai_request_id}/{ai_request_id}.mp4"
-    if os.path.exists(video_path):
+    previous = load_model_response(ai_request_id) if incremental else None
+    generated = {"audio_files": []}
+    if os.path.exists(video_path) and previous and previous != {"language": language, "response": response}:
+        logger.info(f"Model response changed for ai_request_id: {ai_request_id}, regenerating changed slides...")
+        generated = await regenerate_content(ai_request_id, language, response, previous, profile, progress)
+    elif os.path.exists(video_path):
         logger.info(f"Video already exists for ai_request_id: {ai_request_id} at {video_path}")
     else:
         logger.info(f"No existing video found for ai_request_id: {ai_request_id}, generating...")
-        await generate_content(ai_request_id, language, response)
+        generated = await generate_content(ai_request_id, language, response, profile, progress)
+
+    failures = failed_slides(generated["audio_files"])
+    if failures:
+        logger.warning(f"{failed_slides_message(failures)} for ai_request_id: {ai_request_id}, "
+                       f"uploading the video without them")
+    uploaded = await upload_video(ai_request_id, language, response, spring_boot_host, progress)
+    return {**uploaded, "failed_slides": failures}
+
+def failed_slides(audio_files: list) -> list:
+    """The per-slide failures collect_audio reported, as [{"slide_id", "error"}]."""
+    return [{"slide_id": item["slide_id"], "error": item["error"]} for item in audio_files if item.get("error")]
+
+def failed_slides_message(failures: list) -> str:
+    return "Audio generation failed for slides " + ", ".join(str(item["slide_id"]) for item in failures)
 
+async def upload_video(ai_request_id: UUID, language: str, response: dict, spring_boot_host: str, progress=None):
+    video_path = f"presentations/{ai_request_id}/{ai_request_id}.mp4"
+    check_cancelled(ai_request_id)
+    report_progress(progress, "uploading")
     async with httpx.AsyncClient() as client:
         logger.info(f"Sending video to Spring Boot for ai_request_id: {ai_request_id}")
         with open(video_path, 'rb') as video_file:
@@ -97,7 +340,54 @@ async def check_and_generate_video(ai_request_id: UUID, language: str, response:
             logger.info(f"Spring Boot notified successfully: {response.json()}")
     return {"video": video_path}
 
-async def create_audio(speech, language: str, path: str):
+def voice_for_language(language: str) -> str:
+    return TTS_VOICES.get(language, TTS_VOICES["en"])
+
+def normalize_script(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+async def synthesize_cached(speech_text: str, file_name: str, file_path: str, voice: str):
+    full_path = os.path.join(file_path, file_name)
+    key = tts_cache.make_key(normalize_script(speech_text), voice)
+    if await asyncio.to_thread(tts_cache.fetch, key, full_path):
+        logger.info(f"Reused cached audio for {file_name}")
+        return full_path
+    await asyncio.to_thread(remove_stale, full_path)
+    await synthesize_with_retry(speech_text, file_name, file_path, voice)
+    await asyncio.to_thread(tts_cache.store, key, full_path)
+    return full_path
+
+async def synthesize_with_retry(speech_text: str, file_name: str, file_path: str, voice: str):
+    """Synthesise into a temporary file and move it into place only once complete.
+
+    edge-tts opens its output before any audio arrives, so a failed attempt leaves an empty or truncated
+    file; the slide's audio file must exist only when synthesis succeeded.
+    """
+    voice_semaphore = voice_semaphores.setdefault(voice, asyncio.Semaphore(TTS_PER_VOICE_LIMIT))
+    full_path = os.path.join(file_path, file_name)
+    tmp_name = f"{file_name}.{os.getpid()}.tmp"
+    for attempt in range(1, TTS_MAX_RETRIES + 1):
+        try:
+            async with tts_semaphore, voice_semaphore:
+                tmp_path = await generate_audio(speech_text=speech_text, file_name=tmp_name, file_path=file_path,
+                                                voice=voice)
+            os.replace(tmp_path, full_path)
+            return full_path
+        except BaseException as e:
+            tmp_path = os.path.join(file_path, tmp_name)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            if not isinstance(e, Exception) or attempt == TTS_MAX_RETRIES:
+                raise
+            delay = TTS_RETRY_BACKOFF * 2 ** (attempt - 1)
+            logger.warning(f"TTS attempt {attempt} failed for {file_name}: {e}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+async def create_audio(speech, language: str, path: str, progress=None):
+    return await collect_audio(start_audio(speech, language, path, progress))
+
+def start_audio(speech, language: str, path: str, progress=None) -> dict:
+    """Start synthesising every slide's script; returns {slide_id: task resolving to the audio path}."""
     logger.info(f"Creating audio with language: {language}, path: {path}")
     os.makedirs(path, exist_ok=True)
     logger.info(f"Created audio directory: {path}")
@@ -109,8 +399,8 @@ async def create_audio(speech, language: str, path: str):
         speech_data = speech
     logger.info(f"Speech data: {speech_data}")
 
-    generated_files = []
-
+    voice = voice_for_language(language)
+    tasks = {}
     for slide in speech_data:
         slide_id = slide.get("id")
         script = slide.get("script")
@@ -121,29 +411,33 @@ async def create_audio(speech, language: str, path: str):
             continue
 
         file_name = f"audio{slide_id}.mp3"
-        file_path = os.path.join(path, file_name)
-
-        voice = "en-US-AriaNeural"
-        if language == "fr":
-            voice = "fr-FR-DeniseNeural"
-        elif language == "es":
-            voice = "es-ES-ElviraNeural"
-        elif language == "it":
-            voice = "it-IT-ElsaNeural"
-
-        logger.info(f"Generating audio for slide {slide_id} with voice {voice}")
-        await generate_audio(
-            speech_text=script,
-            file_name=file_name,
-            file_path=path,
-            voice=voice
-        )
-        logger.info(f"Audio generated for slide {slide_id}")
+        tasks[slide_id] = asyncio.ensure_future(synthesize_slide_audio(slide_id, script, file_name, path, voice, progress))
 
-        generated_files.append({
-            "slide_id": slide_id,
-            "audio_file": file_path
-        })
+    logger.info(f"Generating {len(tasks)} audio files with voice {voice}")
+    return tasks
+
+async def synthesize_slide_audio(slide_id, script: str, file_name: str, path: str, voice: str, progress=None):
+    try:
+        audio_file = await synthesize_cached(script, file_name, path, voice)
+    except Exception:
+        report_progress(progress, "tts", slide_id, "audio_failed")
+        raise
+    logger.info(f"Audio generated for slide {slide_id}")
+    report_progress(progress, "tts", slide_id, "audio")
+    return audio_file
+
+async def collect_audio(tasks: dict) -> list:
+    results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    generated_files = []
+    for slide_id, result in zip(tasks, results):
+        if isinstance(result, Exception):
+            logger.error(f"Audio generation failed for slide {slide_id}: {result}")
+            generated_files.append({"slide_id": slide_id, "audio_file": None, "error": str(result)})
+            continue
+        if isinstance(result, BaseException):
+            raise result
+        generated_files.append({"slide_id": slide_id, "audio_file": result})
 
     return generated_files
 
@@ -154,13 +448,14 @@ async def generate_audio(speech_text: str, file_name: str, file_path: str, voice
     await communicate.save(full_path)
     return full_path
 
-async def generate_slides(slides, path: str):
+async def generate_slides(slides, path: str, progress=None):
     logger.info(f"Starting generate_slides with slides: {slides} and path: {path}")
     output_dir = Path(path)
     output_dir.mkdir(exist_ok=True)
     logger.info(f"Created output directory: {output_dir}")
 
     generated_files = []
+    files = []
 
     for slide in slides:
         logger.info(f"Processing slide: {slide}")
@@ -173,19 +468,19 @@ async def generate_slides(slides, path: str):
         html_content = generate_html_slide(slide)
         logger.info(f"HTML content generated with length: {len(html_content)}")
 
-        filename = f"slide{slide_id}.html"
-        filepath = output_dir / filename
-        logger.info(f"Writing to file: {filepath}")
-
-        with open(filepath, 'w', encoding='utf-8') as html_file:
-            html_file.write(html_content)
-        logger.info(f"File written successfully: {filepath}")
-
+        filepath = output_dir / f"slide{slide_id}.html"
+        files.append((filepath, html_content))
         generated_files.append({
             "slide_id": slide_id,
             "html_file": str(filepath)
         })
 
+    # One trip off the event loop for the whole deck
+    await asyncio.to_thread(write_slide_files, files)
+    logger.info(f"Wrote {len(files)} slide files to {output_dir}")
+    for item in generated_files:
+        report_progress(progress, "slides", item["slide_id"], "html")
+
     logger.info(f"Returning {len(generated_files)} generated files")
     return generated_files
 
@@ -193,278 +488,44 @@ def count_slides(slides):
     return len(slides)
 
 def generate_html_slide(slide_data):
-    html_template = f"""<!DOCTYPE html>
-<html lang="fr">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{slide_data.get('title', f"Slide {slide_data['id']}")}</title>
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/prism/1.29.0/themes/prism-tomorrow.min.css">
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/prism/1.29.0/components/prism-core.min.js"></script>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/prism/1.29.0/plugins/autoloader/prism-autoloader.min.js"></script>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{ 
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; 
-            line-height: 1.6; 
-            color: #333; 
-            background: white; 
-            min-height: 100vh; 
-            padding: 20px; 
-        }}
-        .container {{ 
-            max-width: 1200px; 
-            margin: 0 auto; 
-            background: white; 
-            border: 2px solid #0066CC; 
-            border-radius: 8px; 
-        }}
-        .header {{ 
-            background: #0066CC; 
-            color: white; 
-            padding: 20px 30px; 
-            position: relative; 
-        }}
-        .slide-number {{ 
-            position: absolute; 
-            top: 20px; 
-            right: 30px; 
-            background: rgba(255, 255, 255, 0.2); 
-            padding: 5px 10px; 
-            border-radius: 4px; 
-            font-size: 14px; 
-        }}
-        .title {{ 
-            font-size: 1.8em; 
-            font-weight: 600; 
-            margin-bottom: 10px; 
-        }}
-        .content {{ 
-            padding: 30px; 
-        }}
-        .summary {{ 
-            background: #f8f9fa; 
-            border: 1px solid #e9ecef; 
-            border-left: 4px solid #0066CC; 
-            padding: 20px; 
-            margin-bottom: 30px; 
-            border-radius: 4px; 
-        }}
-        .summary h2 {{ 
-            color: #0066CC; 
-            font-size: 1.2em; 
-            margin-bottom: 15px; 
-            font-weight: 600; 
-        }}
-        .summary ul {{ 
-            list-style: none; 
-            padding-left: 0; 
-        }}
-        .summary li {{ 
-            margin: 10px 0; 
-            padding: 8px 0; 
-            border-bottom: 1px solid #e9ecef; 
-            padding-left: 15px; 
-            position: relative; 
-        }}
-        .summary li::before {{ 
-            content: "•"; 
-            position: absolute; 
-            left: 0; 
-            color: #0066CC; 
-            font-weight: bold; 
-        }}
-        .summary li:last-child {{ 
-            border-bottom: none; 
-        }}
-        .summary strong {{ 
-            color: #333; 
-            font-weight: 600; 
-        }}
-        .code-section {{ 
-            border: 1px solid #e9ecef; 
-            border-radius: 4px; 
-            overflow: hidden; 
-            margin-top: 20px; 
-        }}
-        .code-header {{ 
-            background: #0066CC; 
-            color: white; 
-            padding: 10px 20px; 
-            font-weight: 500; 
-            display: flex; 
-            align-items: center; 
-            justify-content: space-between; 
-        }}
-        .code-lang {{ 
-            background: rgba(255, 255, 255, 0.2); 
-            padding: 3px 8px; 
-            border-radius: 3px; 
-            font-size: 0.9em; 
-        }}
-        .code-content {{ 
-            background: white; 
-            border-top: 1px solid #e9ecef; 
-        }}
-        .code-content pre {{ 
-            margin: 0; 
-            padding: 20px; 
-            background: white; 
-            color: #333; 
-            font-family: 'Consolas', 'Monaco', 'Courier New', monospace; 
-            font-size: 14px; 
-            line-height: 1.5; 
-            overflow-x: auto; 
-            border: none; 
-        }}
-        .code-content pre code {{ 
-            background: none; 
-            padding: 0; 
-            border-radius: 0; 
-            color: #333; 
-        }}
-        .navigation {{ 
-            background: #f8f9fa; 
-            padding: 15px 30px; 
-            border-top: 1px solid #e9ecef; 
-            display: flex; 
-            justify-content: space-between; 
-            align-items: center; 
-        }}
-        .nav-button {{ 
-            background: #0066CC; 
-            color: white; 
-            border: none; 
-            padding: 8px 16px; 
-            border-radius: 4px; 
-            cursor: pointer; 
-            font-weight: 500; 
-            text-decoration: none; 
-            display: inline-flex; 
-            align-items: center; 
-            gap: 5px; 
-            transition: background-color 0.2s ease; 
-        }}
-        .nav-button:hover {{ 
-            background: #0052A3; 
-        }}
-        .nav-button:disabled {{ 
-            background: #ccc; 
-            cursor: not-allowed; 
-        }}
-        .slide-indicator {{ 
-            background: white; 
-            border: 1px solid #e9ecef; 
-            border-radius: 4px; 
-            padding: 5px 12px; 
-            color: #666; 
-            font-size: 0.9em; 
-        }}
-        .unavailable {{ 
-            color: #666; 
-            font-style: italic; 
-            text-align: center; 
-            padding: 20px; 
-            background: #f8f9fa; 
-            border-radius: 4px; 
-            border: 1px solid #e9ecef; 
-        }}
-        @media (max-width: 768px) {{ 
-            .container {{ 
-                margin: 10px; 
-                border-radius: 4px; 
-            }} 
-            .header {{ 
-                padding: 15px 20px; 
-            }} 
-            .title {{ 
-                font-size: 1.5em; 
-            }} 
-            .content {{ 
-                padding: 20px; 
-            }} 
-            .navigation {{ 
-                padding: 15px 20px; 
-                flex-direction: column; 
-                gap: 10px; 
-            }} 
-            .nav-button {{ 
-                width: 100%; 
-                justify-content: center; 
-            }} 
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <div class="slide-number">Slide {slide_data['id']}</div>
-        </div>
-        <div class="content">
-            <div class="summary">
-                <h2>Résumé</h2>
-                {slide_data.get('summary', 'Résumé indisponible')}
-            </div>
-            <div class="code-section">
-                <div class="code-header">
-                    <span>Code</span>
-                </div>
-                <div class="code-content">
-                    {slide_data.get('example_code', '<pre><code>// Code indisponible</code></pre>')}
-                </div>
-            </div>
-        </div>
-    </div>
-</body>
-</html>
-"""
-    return html_template
-
-def capture_slide(html_path: str, output_png: str):
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--window-size=1920,1080')
-    options.add_argument('--disable-gpu')
-    options.add_argument('--disable-software-rasterizer')
-    options.add_argument('--disable-background-timer-throttling')
-    options.add_argument('--disable-renderer-backgrounding')
-    options.add_argument('--disable-backgrounding-occluded-windows')
-
-    driver = None
+    return render_slide(slide_data, theme="default")
+
+def capture_slide(html_path: str, output_png: str, browser: PooledBrowser = None):
+    if browser is None:
+        with browser_pool.browser() as browser:
+            return capture_slide(html_path, output_png, browser)
+
     try:
-        driver = webdriver.Chrome(options=options)
-        abs_path = os.path.abspath(html_path)
-        driver.get(f"file://{abs_path}")
-        time.sleep(3)
-        driver.set_window_size(1920, 1080)
-        time.sleep(1)
-        driver.save_screenshot(output_png)
+        with capture_copy(html_path) as local_html:
+            browser.open(f"file://{os.path.abspath(local_html)}")
+            browser.wait_until_ready()
+            browser.driver.save_screenshot(output_png)
         logger.info(f"Screenshot saved: {output_png}")
     except Exception as e:
         logger.error(f"Error capturing slide {html_path}: {e}")
         raise
-    finally:
-        if driver:
-            driver.quit()
 
-def create_video_from_image_audio(image: str, audio: str, output: str):
+def encoder_thread_args() -> list:
+    # Only limits the encoder as an output option; before an -i it would apply to that input's decoder
+    return ['-threads', str(FFMPEG_THREADS)] if FFMPEG_THREADS > 0 else []
+
+def create_video_from_image_audio(image: str, audio: str, output: str, profile: EncodingProfile = None, ai_request_id=None):
+    profile = profile or get_encoding_profile()
     try:
         cmd = [
-            'ffmpeg', '-y', '-loop', '1', '-i', image, '-i', audio,
-            '-c:v', 'libx264', '-tune', 'stillimage', '-c:a', 'aac', '-b:a', '128k',
+            'ffmpeg', '-y', *profile.input_args(), '-loop', '1', '-i', image, '-i', audio,
+            *profile.video_args(), *profile.audio_args(),
             '-vf', 'scale=trunc(iw/2)*2:trunc(ih/2)*2',
-            '-pix_fmt', 'yuv420p', '-shortest', output
+            '-shortest', *encoder_thread_args(), output
         ]
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        run_process(cmd, ai_request_id)
         logger.info(f"Video created: {output}")
     except subprocess.CalledProcessError as e:
         logger.error(f"Error creating video {output}: {e}")
         logger.error(f"FFmpeg stderr: {e.stderr}")
         raise
 
-def concat_videos(video_list: list, output_file: str):
+def concat_videos(video_list: list, output_file: str, ai_request_id=None):
     try:
         output_dir = os.path.dirname(output_file)
         videos_txt = os.path.join(output_dir, 'videos.txt')
@@ -473,7 +534,7 @@ def concat_videos(video_list: list, output_file: str):
                 abs_video_path = os.path.abspath(video)
                 f.write(f"file '{abs_video_path}'\n")
         cmd = ['ffmpeg', '-y', '-f', 'concat', '-safe', '0', '-i', videos_txt, '-c', 'copy', output_file]
-        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        run_process(cmd, ai_request_id)
         logger.info(f"Final video created: {output_file}")
         os.remove(videos_txt)
     except subprocess.CalledProcessError as e:
@@ -481,7 +542,275 @@ def concat_videos(video_list: list, output_file: str):
         logger.error(f"FFmpeg stderr: {e.stderr}")
         raise
 
-def generate_video(nbr_slides, ai_request_id: UUID):
+def default_video_workers(nbr_slides: int = None) -> int:
+    """Slide threads for one course; nbr_slides is None when the slide count isn't known yet (streaming)."""
+    if VIDEO_WORKERS > 0:
+        workers = VIDEO_WORKERS
+    else:
+        # Each ffmpeg encode already uses FFMPEG_THREADS cores
+        workers = (os.cpu_count() or 1) // max(FFMPEG_THREADS, 1)
+    if nbr_slides is not None:
+        workers = min(workers, nbr_slides)
+    return max(1, workers)
+
+def probe_duration(media: str, ai_request_id=None) -> float:
+    cmd = [
+        'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1', media
+    ]
+    result = run_process(cmd, ai_request_id)
+    return float(result.stdout.strip())
+
+def assemble_video_single_pass(slides: list, output: str, profile: EncodingProfile = None, ai_request_id=None):
+    """Encode the whole course from (image, audio) pairs in one ffmpeg run."""
+    profile = profile or get_encoding_profile()
+    cmd = ['ffmpeg', '-y']
+    filters = []
+    pairs = []
+    for k, (image, audio) in enumerate(slides):
+        duration = probe_duration(audio, ai_request_id)
+        cmd += [*profile.input_args(), '-loop', '1', '-t', f"{duration:.3f}", '-i', image, '-i', audio]
+        filters.append(f"[{2 * k}:v]scale=trunc(iw/2)*2:trunc(ih/2)*2,setsar=1,format=yuv420p[v{k}]")
+        pairs.append(f"[v{k}][{2 * k + 1}:a]")
+    filters.append(f"{''.join(pairs)}concat=n={len(slides)}:v=1:a=1[v][a]")
+    cmd += [
+        '-filter_complex', ';'.join(filters), '-map', '[v]', '-map', '[a]',
+        *profile.video_args(), *profile.audio_args(), *encoder_thread_args(), output
+    ]
+    try:
+        run_process(cmd, ai_request_id)
+        logger.info(f"Final video created in a single pass: {output}")
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Error assembling video {output}: {e}")
+        logger.error(f"FFmpeg stderr: {e.stderr}")
+        raise
+
+def capture_slide_frame(i: int, ai_request_id: UUID, browser: PooledBrowser = None, progress=None):
+    """Screenshot slide i to presentations/{id}/slide{i}.png; needs only its HTML, not its audio."""
+    check_cancelled(ai_request_id)
+    html = f"presentations/{ai_request_id}/slides/slide{i}.html"
+    image = f"presentations/{ai_request_id}/slide{i}.png"
+
+    if not os.path.exists(html):
+        logger.warning(f"HTML file not found: {html}")
+        return None
+
+    with open(html, 'rb') as html_file:
+        slide_key = slide_cache.make_key(html_file.read(), *VIEWPORT)
+    if slide_cache.fetch(slide_key, image):
+        logger.info(f"Reused cached render for slide {i}")
+    elif browser is None:
+        # Only a miss takes a browser from the pool, and the cache is looked up once either way
+        with browser_pool.browser() as pooled:
+            _capture_frame(i, ai_request_id, html, image, slide_key, pooled)
+    else:
+        _capture_frame(i, ai_request_id, html, image, slide_key, browser)
+    report_progress(progress, "rendering", i, "captured")
+    return image
+
+def _capture_frame(i: int, ai_request_id: UUID, html: str, image: str, slide_key: str, browser: PooledBrowser):
+    logger.info(f"Capturing slide {i}...")
+    remove_stale(image)
+    with track_child(ai_request_id, browser):
+        capture_slide(html, image, browser)
+    slide_cache.store(slide_key, image)
+
+def capture_slide_image(i: int, ai_request_id: UUID, browser: PooledBrowser = None, progress=None):
+    audio = f"presentations/{ai_request_id}/audios/audio{i}.mp3"
+    if not os.path.exists(audio):
+        logger.warning(f"Audio file not found: {audio}")
+        return None
+    image = capture_slide_frame(i, ai_request_id, browser, progress)
+    if image is None:
+        return None
+    return image, audio
+
+def slide_fingerprint(i: int, ai_request_id: UUID, profile: EncodingProfile):
+    html = f"presentations/{ai_request_id}/slides/slide{i}.html"
+    audio = f"presentations/{ai_request_id}/audios/audio{i}.mp3"
+    if not (os.path.exists(html) and os.path.exists(audio)):
+        return None
+    with open(html, 'rb') as html_file:
+        return ContentCache.make_key(html_file.read(), file_digest(audio), repr(profile))
+
+def render_slide_clip(i: int, ai_request_id: UUID, browser: PooledBrowser = None, profile: EncodingProfile = None,
+                      progress=None, manifest: ClipManifest = None):
+    check_cancelled(ai_request_id)
+    manifest = manifest or ClipManifest(ai_request_id)
+    profile = profile or get_encoding_profile()
+    video = manifest.clip_path(i)
+    fingerprint = slide_fingerprint(i, ai_request_id, profile)
+    if fingerprint and manifest.is_complete(i, fingerprint):
+        logger.info(f"Slide {i} already checkpointed, skipping")
+        report_progress(progress, "rendering", i, "encoded")
+        return video
+
+    frame = capture_slide_image(i, ai_request_id, browser, progress)
+    if frame is None:
+        return None
+    image, audio = frame
+    return encode_slide_clip(i, ai_request_id, image, audio, fingerprint, profile, manifest, progress)
+
+def finish_slide_clip(i: int, ai_request_id: UUID, image: str, profile: EncodingProfile, manifest: ClipManifest,
+                      progress=None):
+    """Encode an already captured slide once its audio exists, unless an identical clip is checkpointed."""
+    check_cancelled(ai_request_id)
+    audio = f"presentations/{ai_request_id}/audios/audio{i}.mp3"
+    fingerprint = slide_fingerprint(i, ai_request_id, profile)
+    if fingerprint is None or manifest.is_complete(i, fingerprint):
+        if os.path.exists(image):
+            os.remove(image)
+        if fingerprint is None:
+            logger.warning(f"Audio file not found: {audio}")
+            return None
+        logger.info(f"Slide {i} already checkpointed, skipping")
+        report_progress(progress, "rendering", i, "encoded")
+        return manifest.clip_path(i)
+    return encode_slide_clip(i, ai_request_id, image, audio, fingerprint, profile, manifest, progress)
+
+def encode_slide_clip(i: int, ai_request_id: UUID, image: str, audio: str, fingerprint: str, profile: EncodingProfile,
+                      manifest: ClipManifest, progress=None):
+    partial_clip = manifest.partial_path(i)
+    os.makedirs(os.path.dirname(partial_clip), exist_ok=True)
+    try:
+        clip_key = None
+        cached = False
+        if CLIP_CACHE_ENABLED:
+            clip_key = clip_cache.make_key(file_digest(image), file_digest(audio), repr(profile))
+            cached = clip_cache.fetch(clip_key, partial_clip)
+            if cached:
+                logger.info(f"Reused cached clip for slide {i}")
+        if not cached:
+            remove_stale(partial_clip)
+            create_video_from_image_audio(image, audio, partial_clip, profile, ai_request_id)
+            if clip_key:
+                clip_cache.store(clip_key, partial_clip)
+        manifest.commit(i, fingerprint)
+    finally:
+        if os.path.exists(image):
+            os.remove(image)
+    report_progress(progress, "rendering", i, "encoded")
+    return manifest.clip_path(i)
+
+def publish_to_hls(task, hls: HlsPlaylist):
+    """Wrap a map_slides task so each finished clip is appended to the HLS playlist."""
+    def publish(i: int, ai_request_id: UUID, *args):
+        clip = task(i, ai_request_id, *args)
+        hls.add(i, clip)
+        return clip
+    return publish
+
+def map_slides(task, slide_numbers, ai_request_id: UUID, parallel: bool, workers: int = None) -> dict:
+    results = {}
+    if parallel and len(slide_numbers) > 1:
+        workers = workers or default_video_workers(len(slide_numbers))
+        logger.info(f"Processing {len(slide_numbers)} slides with {workers} workers")
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slide-render")
+        try:
+            futures = {executor.submit(task, i, ai_request_id): i for i in slide_numbers}
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+    else:
+        with browser_pool.browser() as browser:
+            for i in slide_numbers:
+                results[i] = task(i, ai_request_id, browser)
+    return results
+
+async def generate_video_overlapped(slides, ai_request_id: UUID, audio_tasks: dict, parallel: bool = VIDEO_PARALLEL,
+                                   workers: int = None, assembly: str = VIDEO_ASSEMBLY, profile: str = None,
+                                   progress=None):
+    """Like generate_video, but capture slides while their audio is still being synthesised.
+
+    In concat mode each clip is encoded as soon as both its image and its audio are ready.
+    slides is a slide count or the ids of the slides to render.
+    """
+    async with render_slots:
+        encoding_profile = get_encoding_profile(profile)
+        logger.info(f"Encoding with profile '{encoding_profile.name}'")
+        output_dir = f'presentations/{ai_request_id}'
+        slide_numbers = resolve_slide_numbers(slides)
+        final_video = f"{output_dir}/{ai_request_id}.mp4"
+        remove_stale(final_video)
+        workers = (workers or default_video_workers(len(slide_numbers))) if parallel else 1
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slide-render")
+        loop = asyncio.get_running_loop()
+        manifest = ClipManifest(ai_request_id)
+        tasks = []
+        try:
+            captures = {i: loop.run_in_executor(executor, capture_slide_frame, i, ai_request_id, None, progress)
+                        for i in slide_numbers}
+            if assembly == "single_pass":
+                images = await asyncio.gather(*captures.values())
+                await asyncio.gather(*audio_tasks.values(), return_exceptions=True)
+                report_progress(progress, "rendering")
+                audios = [f"presentations/{ai_request_id}/audios/audio{i}.mp3" for i in slide_numbers]
+                slides = [(image, audio) for image, audio in zip(images, audios) if image and os.path.exists(audio)]
+                if not slides:
+                    raise ValueError("No slides were captured")
+                check_cancelled(ai_request_id)
+                report_progress(progress, "encoding")
+                await loop.run_in_executor(executor, assemble_video_single_pass, slides, final_video,
+                                           encoding_profile, ai_request_id)
+            else:
+                # Speech ids may arrive as strings while slides are numbered as ints
+                audio_by_slide = {normalize_slide_id(slide_id): task for slide_id, task in audio_tasks.items()}
+                hls = HlsPlaylist(ai_request_id, encoding_profile) if VIDEO_HLS else None
+                tasks = [asyncio.ensure_future(_encode_when_ready(
+                    i, ai_request_id, captures[i], audio_by_slide.get(i), executor, encoding_profile, manifest,
+                    progress, hls
+                )) for i in slide_numbers]
+                await asyncio.gather(*audio_tasks.values(), return_exceptions=True)
+                report_progress(progress, "rendering")
+                clips = await asyncio.gather(*tasks)
+                if hls:
+                    await loop.run_in_executor(executor, hls.finish)
+                videos = [clip for clip in clips if clip]
+                if not videos:
+                    raise ValueError("No videos were generated")
+                check_cancelled(ai_request_id)
+                report_progress(progress, "encoding")
+                await loop.run_in_executor(executor, concat_videos, videos, final_video, ai_request_id)
+            report_progress(progress, "encoding", None, "concat")
+            logger.info(f"Course video generated successfully: {final_video}")
+            return final_video
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+            manifest.remove_partials()
+            raise
+        finally:
+            await asyncio.to_thread(executor.shutdown, True)
+            for i in slide_numbers:
+                image = f"{output_dir}/slide{i}.png"
+                if os.path.exists(image):
+                    os.remove(image)
+
+async def _encode_when_ready(i: int, ai_request_id: UUID, capture, audio_task, executor, profile: EncodingProfile,
+                             manifest: ClipManifest, progress=None, hls: HlsPlaylist = None):
+    image = await capture
+    if audio_task is not None:
+        try:
+            await audio_task
+        except Exception:
+            # Already reported by collect_audio; finish_slide_clip leaves the slide out
+            pass
+    loop = asyncio.get_running_loop()
+    clip = None
+    if image is not None:
+        clip = await loop.run_in_executor(executor, finish_slide_clip, i, ai_request_id, image, profile, manifest,
+                                          progress)
+    if hls:
+        await loop.run_in_executor(executor, hls.add, i, clip)
+    return clip
+
+def generate_video(slides, ai_request_id: UUID, parallel: bool = VIDEO_PARALLEL, workers: int = None,
+                   assembly: str = VIDEO_ASSEMBLY, profile: str = None, progress=None):
+    """Render the course video from a slide count (slides 1..n) or the ids of the slides to render."""
+    encoding_profile = get_encoding_profile(profile)
+    logger.info(f"Encoding with profile '{encoding_profile.name}'")
     slides_dir = f'presentations/{ai_request_id}/slides'
     audio_dir = f'presentations/{ai_request_id}/audios'
     output_dir = f'presentations/{ai_request_id}'
@@ -491,44 +820,49 @@ def generate_video(nbr_slides, ai_request_id: UUID):
     if not os.path.exists(audio_dir):
         raise FileNotFoundError(f"Audio directory not found: {audio_dir}")
 
-    videos = []
+    slide_numbers = resolve_slide_numbers(slides)
+    final_video = f"{output_dir}/{ai_request_id}.mp4"
+    # The previous video may be hard-linked into a presentation reused from the model response cache
+    remove_stale(final_video)
     try:
-        for i in range(1, int(nbr_slides) + 1):
-            html = f"{slides_dir}/slide{i}.html"
-            image = f"{output_dir}/slide{i}.png"
-            audio = f"{audio_dir}/audio{i}.mp3"
-            video = f"{output_dir}/slide{i}.mp4"
-
-            if not os.path.exists(html):
-                logger.warning(f"HTML file not found: {html}")
-                continue
-            if not os.path.exists(audio):
-                logger.warning(f"Audio file not found: {audio}")
-                continue
-
-            logger.info(f"Processing slide {i}...")
-            capture_slide(html, image)
-            create_video_from_image_audio(image, audio, video)
-            videos.append(video)
-            if os.path.exists(image):
-                os.remove(image)
-
-        if not videos:
-            raise ValueError("No videos were generated")
-
-        final_video = f"{output_dir}/{ai_request_id}.mp4"
-        concat_videos(videos, final_video)
-        for v in videos:
-            if os.path.exists(v):
-                os.remove(v)
+        if assembly == "single_pass":
+            capture = partial(capture_slide_image, progress=progress)
+            frames = map_slides(capture, slide_numbers, ai_request_id, parallel, workers)
+            slides = [frames[i] for i in slide_numbers if frames.get(i)]
+            if not slides:
+                raise ValueError("No slides were captured")
+            check_cancelled(ai_request_id)
+            report_progress(progress, "encoding")
+            assemble_video_single_pass(slides, final_video, encoding_profile, ai_request_id)
+            report_progress(progress, "encoding", None, "concat")
+        else:
+            # Finished clips are checkpointed under clips/ so a retry or an incremental run skips them
+            manifest = ClipManifest(ai_request_id)
+            render = partial(render_slide_clip, profile=encoding_profile, progress=progress, manifest=manifest)
+            hls = HlsPlaylist(ai_request_id, encoding_profile) if VIDEO_HLS else None
+            if hls:
+                render = publish_to_hls(render, hls)
+            clips = map_slides(render, slide_numbers, ai_request_id, parallel, workers)
+            if hls:
+                hls.finish()
+            videos = [clips[i] for i in slide_numbers if clips.get(i)]
+            if not videos:
+                raise ValueError("No videos were generated")
+            check_cancelled(ai_request_id)
+            report_progress(progress, "encoding")
+            concat_videos(videos, final_video, ai_request_id)
+            report_progress(progress, "encoding", None, "concat")
 
         logger.info(f"Course video generated successfully: {final_video}")
         return final_video
-    except Exception as e:
-        for v in videos:
-            if os.path.exists(v):
-                os.remove(v)
-        raise e
+    except Exception:
+        ClipManifest(ai_request_id).remove_partials()
+        raise
+    finally:
+        for i in slide_numbers:
+            image = f"{output_dir}/slide{i}.png"
+            if os.path.exists(image):
+                os.remove(image)
 
 async def transfer_video(ai_request_id: UUID, spring_boot_host: str = "localhost", x_api_key: str = Depends(verify_api_key)) -> dict:
     try:
@@ -0,0 +1,59 @@
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+VIDEO_ENCODING_PROFILE = os.getenv("VIDEO_ENCODING_PROFILE", "standard")
+
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    name: str
+    frame_rate: Optional[float] = None
+    gop: Optional[int] = None
+    crf: Optional[int] = None
+    preset: Optional[str] = None
+    tune: Optional[str] = "stillimage"
+    audio_codec: str = "aac"
+    audio_bitrate: str = "128k"
+
+    def input_args(self) -> list:
+        """Arguments placed before a looped image input."""
+        return ['-framerate', str(self.frame_rate)] if self.frame_rate else []
+
+    def video_args(self) -> list:
+        args = ['-c:v', 'libx264']
+        if self.tune:
+            args += ['-tune', self.tune]
+        if self.preset:
+            args += ['-preset', self.preset]
+        if self.crf is not None:
+            args += ['-crf', str(self.crf)]
+        if self.frame_rate:
+            args += ['-r', str(self.frame_rate)]
+        if self.gop:
+            args += ['-g', str(self.gop)]
+        return args + ['-pix_fmt', 'yuv420p']
+
+    def keyframe_interval(self) -> float:
+        """Longest stretch without a keyframe, in seconds (x264 defaults to 250 frames at 25 fps)."""
+        return (self.gop or 250) / (self.frame_rate or 25)
+
+    def audio_args(self) -> list:
+        return ['-c:a', self.audio_codec, '-b:a', self.audio_bitrate]
+
+
+ENCODING_PROFILES = {
+    # ffmpeg defaults (25 fps, crf 23, medium preset), as slides were always encoded
+    "standard": EncodingProfile(name="standard"),
+    # A slide is one still frame per clip: 2 fps with a keyframe every 5 seconds keeps seeking usable
+    "still": EncodingProfile(name="still", frame_rate=2, gop=10, crf=28, preset="veryfast", audio_bitrate="96k"),
+    "still_hq": EncodingProfile(name="still_hq", frame_rate=5, gop=25, crf=20, preset="medium", audio_bitrate="160k"),
+    "draft": EncodingProfile(name="draft", frame_rate=1, gop=10, crf=32, preset="ultrafast", audio_bitrate="64k"),
+}
+
+
+def get_encoding_profile(name: str = None) -> EncodingProfile:
+    name = name or VIDEO_ENCODING_PROFILE
+    if name not in ENCODING_PROFILES:
+        raise ValueError(f"Unknown encoding profile '{name}', expected one of {list(ENCODING_PROFILES)}")
+    return ENCODING_PROFILES[name]
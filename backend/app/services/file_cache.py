@@ -0,0 +1,157 @@
+import os
+import shutil
+import hashlib
+import threading
+import logging
+
+CACHE_DIR = os.getenv("CACHE_DIR", "cache")
+# Zero-byte marker next to each entry whose mtime records its last use
+USED_SUFFIX = ".used"
+
+logger = logging.getLogger(__name__)
+
+caches = {}
+
+
+def link_or_copy(source: str, destination: str):
+    """Hard-link when source and destination share a filesystem, copy otherwise."""
+    try:
+        os.link(source, destination)
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remove_stale(path: str):
+    """Unlink a generated file before rewriting it, so a hard-linked cache entry is never truncated in place."""
+    if os.path.lexists(path):
+        os.remove(path)
+
+
+class ContentCache:
+    """Content-addressed files on disk, evicted least-recently-used once over max_bytes.
+
+    Entries are hard-linked into presentations, so a hit must not touch the entry itself: its mtime
+    is every linked copy's mtime, which served files use for their ETag. Use is recorded on a
+    separate marker file instead.
+    """
+
+    def __init__(self, name: str, max_bytes: int, suffix: str = ""):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.directory = os.path.join(CACHE_DIR, name)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        caches[name] = self
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}{self.suffix}")
+
+    def fetch(self, key: str, destination: str) -> bool:
+        path = self.path_for(key)
+        try:
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+            remove_stale(destination)
+            os.makedirs(os.path.dirname(destination) or ".", exist_ok=True)
+            link_or_copy(path, destination)
+            self._mark_used(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        logger.debug(f"{self.name} cache hit {key}")
+        return True
+
+    def store(self, key: str, source: str):
+        path = self.path_for(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        # Copy rather than link: the source may be rewritten in place later on
+        shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    @staticmethod
+    def _mark_used(path: str):
+        with open(path + USED_SUFFIX, 'a'):
+            pass
+        os.utime(path + USED_SUFFIX)
+
+    def _entries(self) -> list:
+        """(last use, size, path) of every entry; last use is its marker's mtime, or its own if never hit."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith((".tmp", USED_SUFFIX)):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                try:
+                    used = os.stat(path + USED_SUFFIX).st_mtime
+                except FileNotFoundError:
+                    used = stat.st_mtime
+                entries.append((max(used, stat.st_mtime), stat.st_size, path))
+        return entries
+
+    def evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            try:
+                os.remove(path + USED_SUFFIX)
+            except FileNotFoundError:
+                pass
+            total -= size
+            with self._lock:
+                self.evictions += 1
+            if total <= self.max_bytes:
+                break
+        logger.info(f"{self.name} cache evicted down to {total} bytes")
+
+    def clear(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def stats(self) -> dict:
+        entries = self._entries()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,148 @@
+import os
+import glob
+import time
+import threading
+import subprocess
+import logging
+from contextlib import contextmanager
+from uuid import UUID
+
+CANCEL_POLL_SECONDS = float(os.getenv("CANCEL_POLL_SECONDS", "1"))
+
+logger = logging.getLogger(__name__)
+
+# ai_request_id -> start time of the run in this process, and its live ffmpeg/browser children
+_runs = {}
+_children = {}
+_lock = threading.Lock()
+
+
+class GenerationCancelled(Exception):
+    pass
+
+
+def cancel_flag_path(ai_request_id) -> str:
+    return f"presentations/{ai_request_id}/.cancel"
+
+
+def cancel_requested(ai_request_id) -> bool:
+    """A cancel counts for the run in progress only if it was requested after that run started."""
+    started = _runs.get(str(ai_request_id))
+    if started is None:
+        return False
+    try:
+        with open(cancel_flag_path(ai_request_id), 'r') as f:
+            return float(f.read() or 0) >= started
+    except (FileNotFoundError, ValueError):
+        return False
+
+
+def check_cancelled(ai_request_id):
+    """Stage boundary: stop the pipeline here if the generation was cancelled."""
+    if cancel_requested(ai_request_id):
+        raise GenerationCancelled(f"Generation cancelled for ai_request_id: {ai_request_id}")
+
+
+@contextmanager
+def track_child(ai_request_id, child):
+    """Register a Popen or PooledBrowser so a cancel can stop it."""
+    key = str(ai_request_id)
+    with _lock:
+        _children.setdefault(key, set()).add(child)
+    try:
+        if cancel_requested(ai_request_id):
+            _kill(child)
+        yield child
+    finally:
+        with _lock:
+            _children.get(key, set()).discard(child)
+
+
+def _kill(child):
+    if isinstance(child, subprocess.Popen):
+        if child.poll() is None:
+            child.kill()
+    else:
+        child.quit()
+
+
+def kill_children(ai_request_id) -> int:
+    with _lock:
+        children = list(_children.get(str(ai_request_id), ()))
+    for child in children:
+        try:
+            _kill(child)
+        except Exception as e:
+            logger.warning(f"Could not stop child of {ai_request_id}: {e}")
+    return len(children)
+
+
+def run_process(cmd: list, ai_request_id=None) -> subprocess.CompletedProcess:
+    """subprocess.run(cmd, check=True, capture_output=True, text=True), killable by a cancel."""
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    with track_child(ai_request_id, process):
+        stdout, stderr = process.communicate()
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+def cleanup_scratch(ai_request_id) -> dict:
+    base = f"presentations/{ai_request_id}"
+    freed = {"files": 0, "bytes": 0}
+    for pattern in ("slide*.png", "clips/*.part.mp4", "videos.txt", "slides/*.capture.html"):
+        for path in glob.glob(os.path.join(base, pattern)):
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            freed["files"] += 1
+            freed["bytes"] += size
+    return freed
+
+
+def request_cancel(ai_request_id: UUID) -> dict:
+    """Flag the generation as cancelled and stop whatever this process is running for it.
+
+    Generations running in a worker process see the flag through their CancelWatcher.
+    """
+    path = cancel_flag_path(ai_request_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(str(time.time()))
+    killed = kill_children(ai_request_id)
+    freed = cleanup_scratch(ai_request_id)
+    logger.info(f"Cancel requested for {ai_request_id}: stopped {killed} processes, freed {freed}")
+    return {
+        "running_here": str(ai_request_id) in _runs,
+        "killed_processes": killed,
+        "scratch_files_removed": freed["files"],
+        "scratch_bytes_freed": freed["bytes"],
+    }
+
+
+class CancelWatcher:
+    """Marks a run as active and kills its children as soon as a cancel flag appears."""
+
+    def __init__(self, ai_request_id: UUID):
+        self.ai_request_id = ai_request_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name=f"cancel-watch-{ai_request_id}", daemon=True)
+
+    def __enter__(self):
+        _runs[str(self.ai_request_id)] = time.time()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        _runs.pop(str(self.ai_request_id), None)
+
+    def _watch(self):
+        while not self._stop.wait(CANCEL_POLL_SECONDS):
+            if cancel_requested(self.ai_request_id):
+                killed = kill_children(self.ai_request_id)
+                if killed:
+                    logger.info(f"Stopped {killed} processes of cancelled generation {self.ai_request_id}")
@@ -0,0 +1,101 @@
+import os
+import json
+import time
+import asyncio
+import threading
+import logging
+from datetime import datetime
+from uuid import UUID
+
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", "0.5"))
+EVENTS_KEEPALIVE_SECONDS = float(os.getenv("EVENTS_KEEPALIVE_SECONDS", "15"))
+
+TERMINAL_EVENTS = ("done", "failed", "cancelled")
+
+# Pipeline (stage, step) pairs and the event name they are published under
+STEP_EVENTS = {
+    ("slides", "html"): "slide_html_written",
+    ("tts", "audio"): "audio_done",
+    ("tts", "audio_failed"): "audio_failed",
+    ("rendering", "captured"): "frame_captured",
+    ("rendering", "encoded"): "clip_encoded",
+    ("encoding", "concat"): "concat_done",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def events_path(ai_request_id) -> str:
+    return f"presentations/{ai_request_id}/events.jsonl"
+
+
+class EventRecorder:
+    """Append generation events to presentations/{id}/events.jsonl, readable from any process."""
+
+    def __init__(self, ai_request_id: UUID):
+        self.path = events_path(ai_request_id)
+        self.started = time.monotonic()
+        self.stage_started = self.started
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # A new run starts a new log; readers notice the file shrinking and start over
+        with open(self.path, 'w', encoding='utf-8'):
+            pass
+
+    def emit(self, event: str, **fields):
+        now = time.monotonic()
+        record = {
+            "event": event,
+            "time": datetime.utcnow().isoformat(),
+            "elapsed": round(now - self.started, 3),
+            **fields,
+        }
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+
+    def __call__(self, stage: str, slide=None, step: str = None):
+        if slide is None and step is None:
+            now = time.monotonic()
+            self.emit("stage", stage=stage, previous_stage_seconds=round(now - self.stage_started, 3))
+            self.stage_started = now
+            return
+        self.emit(STEP_EVENTS.get((stage, step), step or stage), stage=stage, slide=slide)
+
+
+def combine_progress(*hooks):
+    hooks = [hook for hook in hooks if hook is not None]
+
+    def progress(stage: str, slide=None, step: str = None):
+        for hook in hooks:
+            hook(stage, slide, step)
+    return progress
+
+
+async def stream_events(ai_request_id, is_disconnected):
+    """Yield Server-Sent Events for a generation, following the log until it finishes."""
+    path = events_path(ai_request_id)
+    offset = 0
+    last_sent = time.monotonic()
+    while not await is_disconnected():
+        lines = []
+        if os.path.exists(path):
+            if os.path.getsize(path) < offset:
+                offset = 0
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                chunk = f.read()
+            # Keep a partially written last line for the next poll
+            complete = chunk[:chunk.rfind(b"\n") + 1]
+            offset += len(complete)
+            lines = complete.decode('utf-8').splitlines()
+        for line in lines:
+            record = json.loads(line)
+            yield f"event: {record['event']}\ndata: {line}\n\n"
+            last_sent = time.monotonic()
+            if record["event"] in TERMINAL_EVENTS:
+                return
+        if time.monotonic() - last_sent > EVENTS_KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            last_sent = time.monotonic()
+        await asyncio.sleep(EVENTS_POLL_SECONDS)
@@ -0,0 +1,161 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from uuid import UUID
+from sqlalchemy import or_, func, select
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.configs.db import SessionLocal
+from app.models.generation_job import GenerationJob, JobStatus
+
+GENERATION_JOB_STALE_SECONDS = int(os.getenv("GENERATION_JOB_STALE_SECONDS", "900"))
+GENERATION_JOB_MAX_ATTEMPTS = int(os.getenv("GENERATION_JOB_MAX_ATTEMPTS", "3"))
+GENERATION_JOB_RETRY_SECONDS = int(os.getenv("GENERATION_JOB_RETRY_SECONDS", "60"))
+
+ACTIVE_STATUSES = (JobStatus.TTS, JobStatus.RENDERING, JobStatus.ENCODING, JobStatus.UPLOADING)
+
+logger = logging.getLogger(__name__)
+
+def submit_job(db: Session, ai_request_id: UUID, language: str, response: dict, spring_boot_host: str = "localhost",
+               profile: str = None, incremental: bool = False) -> GenerationJob:
+    """Queue a generation, or return the job already queued or running for this ai_request_id."""
+    # Serialise submissions per ai_request_id so two concurrent requests cannot both insert a job
+    db.execute(select(func.pg_advisory_xact_lock(UUID(str(ai_request_id)).int & 0x7FFFFFFFFFFFFFFF)))
+    existing = (
+        db.query(GenerationJob)
+        .filter(GenerationJob.ai_request_id == str(ai_request_id))
+        .filter(GenerationJob.status.in_((JobStatus.QUEUED,) + ACTIVE_STATUSES))
+        .order_by(GenerationJob.created_at)
+        .first()
+    )
+    if existing:
+        db.rollback()
+        logger.info(f"Generation job {existing.id} already in flight for ai_request_id: {ai_request_id}")
+        return existing
+    job = GenerationJob(
+        ai_request_id=str(ai_request_id),
+        language=language,
+        response=response,
+        spring_boot_host=spring_boot_host,
+        profile=profile,
+        incremental=incremental,
+        status=JobStatus.QUEUED,
+        progress={},
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    logger.info(f"Queued generation job {job.id} for ai_request_id: {ai_request_id}")
+    return job
+
+def get_job(db: Session, job_id: int) -> GenerationJob:
+    job = db.query(GenerationJob).filter(GenerationJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    return job
+
+def cancel_jobs(db: Session, ai_request_id: UUID) -> int:
+    """Cancel queued jobs outright; running ones stop when their worker sees the cancel flag."""
+    jobs = (
+        db.query(GenerationJob)
+        .filter(GenerationJob.ai_request_id == str(ai_request_id))
+        .filter(GenerationJob.status.in_((JobStatus.QUEUED, JobStatus.FAILED)))
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    now = datetime.utcnow()
+    for job in jobs:
+        job.status = JobStatus.CANCELLED
+        job.finished_at = now
+        job.updated_at = now
+    db.commit()
+    if jobs:
+        logger.info(f"Cancelled {len(jobs)} pending generation jobs for ai_request_id: {ai_request_id}")
+    return len(jobs)
+
+def claim_next_job(db: Session) -> GenerationJob | None:
+    """Take the oldest queued job, a failed one due for retry, or one whose worker stopped reporting progress.
+
+    Retries resume from the clip checkpoints left by the previous attempt.
+    """
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=GENERATION_JOB_STALE_SECONDS)
+    retry_before = now - timedelta(seconds=GENERATION_JOB_RETRY_SECONDS)
+    job = (
+        db.query(GenerationJob)
+        .filter(or_(
+            GenerationJob.status == JobStatus.QUEUED,
+            (GenerationJob.status == JobStatus.FAILED) & (GenerationJob.updated_at < retry_before),
+            GenerationJob.status.in_(ACTIVE_STATUSES) & (GenerationJob.updated_at < stale_before),
+        ))
+        .filter(GenerationJob.attempts < GENERATION_JOB_MAX_ATTEMPTS)
+        .order_by(GenerationJob.created_at)
+        .with_for_update(skip_locked=True)
+        .first()
+    )
+    if not job:
+        db.rollback()
+        return None
+    if job.status != JobStatus.QUEUED:
+        logger.warning(f"Retrying generation job {job.id} (was {job.status.value})")
+    job.status = JobStatus.TTS
+    job.attempts += 1
+    job.started_at = now
+    job.error = None
+    job.finished_at = None
+    db.commit()
+    db.refresh(job)
+    return job
+
+def update_job(job_id: int, status: JobStatus = None, slide=None, step: str = None, **fields):
+    """Record a stage change or a per-slide step; safe to call from render threads."""
+    db = SessionLocal()
+    try:
+        job = db.query(GenerationJob).filter(GenerationJob.id == job_id).with_for_update().first()
+        if not job:
+            return
+        if status:
+            job.status = status
+        if slide is not None and step:
+            job.progress = {**(job.progress or {}), str(slide): step}
+        for key, value in fields.items():
+            setattr(job, key, value)
+        job.updated_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
+
+class JobProgress:
+    """The pipeline's progress(stage, slide, step) hook, recorded as job updates.
+
+    Hooks fire on the event loop (e.g. per-slide TTS), so the database writes run on a single background
+    thread, in order; close() waits for them before the job's final status is written.
+    """
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"job-{job_id}-progress")
+        self._closed = False
+
+    def __call__(self, stage: str, slide=None, step: str = None):
+        if self._closed:
+            # A render thread still winding down after the job ended
+            return
+        # Stages without a job status (e.g. writing slide HTML) only record the slide step
+        status = JobStatus.__members__.get(stage.upper())
+        self._executor.submit(self._update, status, slide, step)
+
+    def _update(self, status, slide, step):
+        try:
+            update_job(self.job_id, status=status, slide=slide, step=step)
+        except Exception as e:
+            logger.warning(f"Could not record progress of job {self.job_id}: {e}")
+
+    def close(self):
+        self._closed = True
+        self._executor.shutdown(wait=True)
+
+
+def job_progress_callback(job_id: int) -> JobProgress:
+    return JobProgress(job_id)
@@ -0,0 +1,102 @@
+import os
+import csv
+import glob
+import math
+import threading
+import logging
+from uuid import UUID
+from app.services.encoding_profiles import EncodingProfile
+from app.services.generation_control import run_process
+
+VIDEO_HLS = os.getenv("VIDEO_HLS", "false").lower() == "true"
+HLS_SEGMENT_SECONDS = float(os.getenv("HLS_SEGMENT_SECONDS", "6"))
+
+PLAYLIST_NAME = "index.m3u8"
+
+logger = logging.getLogger(__name__)
+
+
+def hls_dir(ai_request_id) -> str:
+    return f"presentations/{ai_request_id}/hls"
+
+
+class HlsPlaylist:
+    """EVENT playlist under presentations/{id}/hls, extended slide by slide as clips finish.
+
+    Clips may finish in any order; each slide is published once every slide before it is, so the
+    playlist only ever grows at its end and playback can start after the first slide. Every slide
+    starts a new segment.
+    """
+
+    def __init__(self, ai_request_id: UUID, profile: EncodingProfile):
+        self.ai_request_id = ai_request_id
+        self.directory = hls_dir(ai_request_id)
+        self.path = os.path.join(self.directory, PLAYLIST_NAME)
+        # Segments are cut on keyframes, so one can overrun the segment length by up to a GOP
+        self.target_duration = math.ceil(HLS_SEGMENT_SECONDS + profile.keyframe_interval())
+        self.next_slide = 1
+        self.pending = {}
+        self.segments = []
+        self.offset = 0.0
+        self.finished = False
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        for stale in glob.glob(os.path.join(self.directory, "*")):
+            os.remove(stale)
+        self._write()
+
+    def add(self, slide: int, clip: str = None):
+        """Record slide's finished clip (None if the slide was left out) and publish what is now in order."""
+        with self._lock:
+            self.pending[int(slide)] = clip
+            while self.next_slide in self.pending:
+                self._publish(self.next_slide, self.pending.pop(self.next_slide))
+                self.next_slide += 1
+
+    def finish(self):
+        """Publish whatever is left (slide numbers may have gaps) and close the playlist."""
+        with self._lock:
+            for slide in sorted(self.pending):
+                self._publish(slide, self.pending.pop(slide))
+            self.finished = True
+            self._write()
+        logger.info(f"HLS playlist complete: {self.path} ({len(self.segments)} segments)")
+
+    def _publish(self, slide: int, clip: str):
+        if not clip:
+            return
+        segment_list = os.path.join(self.directory, f"slide{slide}.csv")
+        cmd = [
+            'ffmpeg', '-y', '-i', clip, '-c', 'copy', '-output_ts_offset', f"{self.offset:.6f}",
+            '-f', 'segment', '-segment_time', str(HLS_SEGMENT_SECONDS), '-segment_format', 'mpegts',
+            '-segment_list', segment_list, '-segment_list_type', 'csv',
+            os.path.join(self.directory, f"slide{slide}_%03d.ts"),
+        ]
+        run_process(cmd, self.ai_request_id)
+        with open(segment_list, newline='') as f:
+            rows = [row for row in csv.reader(f) if row]
+        os.remove(segment_list)
+        for name, start, end in rows:
+            duration = float(end) - float(start)
+            self.segments.append((os.path.basename(name), duration))
+            self.offset += duration
+        self._write()
+        logger.info(f"Published slide {slide} to HLS ({len(rows)} segments)")
+
+    def _write(self):
+        lines = [
+            "#EXTM3U",
+            "#EXT-X-VERSION:3",
+            f"#EXT-X-TARGETDURATION:{self.target_duration}",
+            "#EXT-X-MEDIA-SEQUENCE:0",
+            "#EXT-X-PLAYLIST-TYPE:EVENT",
+            "#EXT-X-INDEPENDENT-SEGMENTS",
+        ]
+        for name, duration in self.segments:
+            lines += [f"#EXTINF:{duration:.6f},", name]
+        if self.finished:
+            lines.append("#EXT-X-ENDLIST")
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,90 @@
+import os
+import json
+import threading
+import logging
+from cachetools import LRUCache
+
+MEMORY_CACHE_MAX_MB = int(os.getenv("MEMORY_CACHE_MAX_MB", "64"))
+
+logger = logging.getLogger(__name__)
+
+# In-memory caches, kept apart from file_cache.caches, whose entries all live in a cache directory
+memory_caches = {}
+
+
+def read_text(path: str) -> str:
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def read_bytes(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def read_json(path: str):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+class FileMemoryCache:
+    """Loaded file contents kept in memory, least-recently-used first out, weighted by file size.
+
+    Entries are revalidated against the file's mtime and size on every read, so files rewritten by
+    another process (e.g. a generation worker) are picked up without explicit invalidation.
+    """
+
+    def __init__(self, name: str, max_bytes: int):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = LRUCache(maxsize=max_bytes, getsizeof=lambda entry: entry[2])
+        self._lock = threading.Lock()
+        memory_caches[name] = self
+
+    def get(self, path: str, load=read_text):
+        """Return load(path), from memory while the file is unchanged; FileNotFoundError if it is gone."""
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        key = (path, load)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == signature:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        value = load(path)
+        # Files bigger than the whole cache are served straight from disk
+        if stat.st_size <= self.max_bytes:
+            with self._lock:
+                self._entries[key] = (signature, value, max(stat.st_size, 1))
+        return value
+
+    def invalidate(self, prefix: str) -> int:
+        """Forget every cached file whose path starts with prefix (a file or a presentation directory)."""
+        with self._lock:
+            stale = [key for key in self._entries if key[0].startswith(prefix)]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = len(self._entries)
+            size = self._entries.currsize
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+served_files = FileMemoryCache("served_files", MEMORY_CACHE_MAX_MB * 1024 * 1024)
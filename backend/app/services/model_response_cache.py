@@ -0,0 +1,150 @@
+import os
+import json
+import time
+import shutil
+import threading
+import unicodedata
+import logging
+from uuid import UUID
+from app.schemas.courseRequest import CourseRequest
+from app.services.file_cache import CACHE_DIR, ContentCache, caches, link_or_copy
+
+MODEL_CACHE_ENABLED = os.getenv("MODEL_CACHE_ENABLED", "true").lower() == "true"
+MODEL_CACHE_TTL_SECONDS = int(os.getenv("MODEL_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Media is only ever replaced (never rewritten in place), so it can be shared by hard link
+LINKED_SUFFIXES = (".mp3", ".mp4", ".ts", ".gz", ".br")
+# Per-run state that must not follow a presentation to its copy
+CLONE_IGNORE = shutil.ignore_patterns(".*", "events.jsonl", "videos.txt", "slide*.png", "*.part.mp4", "*.tmp",
+                                     "*.capture.html")
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_text(value: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", value).split()).casefold()
+
+
+def normalize_course_request(payload: CourseRequest) -> dict:
+    """Requests that differ only in case, spacing or repeated axes ask the model for the same course."""
+    axes = []
+    for axis in payload.axes:
+        axis = _normalize_text(axis)
+        if axis and axis not in axes:
+            axes.append(axis)
+    return {
+        "language": _normalize_text(payload.language),
+        "topic": _normalize_text(payload.topic),
+        "level": _normalize_text(payload.level),
+        "axes": axes,
+    }
+
+
+class ModelResponseCache:
+    """Model responses on disk, keyed on the normalised CourseRequest and kept for ttl seconds."""
+
+    def __init__(self, name: str, ttl: int):
+        self.name = name
+        self.ttl = ttl
+        self.directory = os.path.join(CACHE_DIR, name)
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        caches[name] = self
+
+    def key_for(self, payload: CourseRequest) -> str:
+        return ContentCache.make_key(json.dumps(normalize_course_request(payload), sort_keys=True))
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def lookup(self, payload: CourseRequest):
+        """The cached {"ai_request_id", "response", ...} entry for this request, or None."""
+        path = self.path_for(self.key_for(payload))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+                self.expired += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def store(self, payload: CourseRequest, ai_request_id: UUID, response):
+        path = self.path_for(self.key_for(payload))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            "created": time.time(),
+            "request": normalize_course_request(payload),
+            "ai_request_id": str(ai_request_id),
+            "response": response,
+        }
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, payload: CourseRequest = None) -> int:
+        """Drop the entry for one request, or every entry when no request is given."""
+        if payload is not None:
+            return self._remove(self.path_for(self.key_for(payload)))
+        removed = len(self._entries())
+        shutil.rmtree(self.directory, ignore_errors=True)
+        return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except FileNotFoundError:
+            return 0
+
+    def _entries(self) -> list:
+        return [os.path.join(root, name) for root, _, files in os.walk(self.directory)
+                for name in files if name.endswith(".json")]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expired": self.expired,
+            "entries": len(self._entries()),
+            "ttl_seconds": self.ttl,
+        }
+
+
+model_response_cache = ModelResponseCache("model_responses", MODEL_CACHE_TTL_SECONDS)
+
+
+def _link_or_copy_media(source: str, destination: str):
+    if source.endswith(LINKED_SUFFIXES):
+        link_or_copy(source, destination)
+    else:
+        # Keep mtimes so precompressed variants stay at least as new as their sources
+        shutil.copy2(source, destination)
+
+
+def clone_presentation(source_id, target_id) -> bool:
+    """Reuse a presentation already rendered from the same model response under a new ai_request_id."""
+    source = f"presentations/{source_id}"
+    target = f"presentations/{target_id}"
+    if str(source_id) == str(target_id) or not os.path.exists(f"{source}/{source_id}.mp4"):
+        return False
+    if os.path.exists(f"{target}/{target_id}.mp4"):
+        return True
+    shutil.copytree(source, target, ignore=CLONE_IGNORE, copy_function=_link_or_copy_media, dirs_exist_ok=True)
+    os.replace(f"{target}/{source_id}.mp4", f"{target}/{target_id}.mp4")
+    logger.info(f"Reused presentation {source_id} for ai_request_id: {target_id}")
+    return True
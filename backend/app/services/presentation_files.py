@@ -0,0 +1,129 @@
+import os
+import logging
+from email.utils import formatdate, parsedate_to_datetime
+import anyio
+from fastapi import HTTPException, Request
+from starlette.responses import Response
+
+CHUNK_SIZE = 64 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class RangeFileResponse(Response):
+    """Send `length` bytes of a file from `offset`, with sendfile when the server offers zero-copy send."""
+
+    def __init__(self, path: str, status_code: int, headers: dict, media_type: str, offset: int = 0, length: int = 0,
+                 send_body: bool = True):
+        self.path = path
+        self.status_code = status_code
+        self.media_type = media_type
+        self.offset = offset
+        self.length = length
+        self.send_body = send_body
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.length == 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, 'rb') as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f,
+                    "offset": self.offset,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            return
+        async with await anyio.open_file(self.path, 'rb') as f:
+            await f.seek(self.offset)
+            remaining = self.length
+            while remaining:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining:
+                logger.warning(f"{self.path} shrank while being sent")
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def _not_modified_since(header: str, mtime: float) -> bool:
+    try:
+        return int(mtime) <= parsedate_to_datetime(header).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+
+def parse_range(header: str, size: int):
+    """(start, end) for a single "bytes=" range, None to send the whole file, or ValueError if unsatisfiable."""
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        # Multipart ranges are rarely used by players; answering 200 with the whole file is allowed
+        return None
+    if size == 0:
+        raise ValueError(header)
+    start, _, end = spec.strip().partition("-")
+    try:
+        first = int(start) if start else None
+        last = int(end) if end else None
+    except ValueError:
+        return None
+    if first is None:
+        if not last:
+            raise ValueError(header)
+        return max(size - last, 0), size - 1
+    last = size - 1 if last is None else min(last, size - 1)
+    if first >= size or first > last:
+        raise ValueError(header)
+    return first, last
+
+
+def file_response(request: Request, path: str, media_type: str, cache_control: str = "public, max-age=3600") -> Response:
+    """Serve a presentation file with Range, ETag/Last-Modified validators and 304 answers."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found")
+    size = stat.st_size
+    etag = f'"{size:x}-{stat.st_mtime_ns:x}"'
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control,
+        "ETag": etag,
+        "Last-Modified": last_modified,
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if (if_none_match and _etag_matches(if_none_match, etag)) or \
+            (not if_none_match and if_modified_since and _not_modified_since(if_modified_since, stat.st_mtime)):
+        return Response(status_code=304, headers=headers)
+
+    send_body = request.method != "HEAD"
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range.strip() in (etag, last_modified)):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            headers.update({"Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(length)})
+            return RangeFileResponse(path, 206, headers, media_type, start, length, send_body)
+
+    headers["Content-Length"] = str(size)
+    return RangeFileResponse(path, 200, headers, media_type, 0, size, send_body)
@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from uuid import UUID
+from filelock import FileLock, Timeout
+
+SINGLE_FLIGHT_POLL_SECONDS = float(os.getenv("SINGLE_FLIGHT_POLL_SECONDS", "0.5"))
+
+logger = logging.getLogger(__name__)
+
+# ai_request_id -> future of the generation this process is running for it
+_inflight = {}
+
+
+def lock_path(ai_request_id) -> str:
+    return f"presentations/{ai_request_id}/.generate.lock"
+
+
+def result_path(ai_request_id) -> str:
+    return f"presentations/{ai_request_id}/.generate.result.json"
+
+
+def _read_result(ai_request_id, since: float):
+    """The result of a run that finished after `since`, if another process recorded one."""
+    try:
+        with open(result_path(ai_request_id), 'r', encoding='utf-8') as f:
+            record = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if record.get("finished", 0) < since:
+        return None
+    return record["result"]
+
+
+def _write_result(ai_request_id, result: dict):
+    path = result_path(ai_request_id)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"finished": time.time(), "result": result}, f)
+    os.replace(tmp_path, path)
+
+
+async def _acquire(lock: FileLock, ai_request_id) -> bool:
+    """Take the cross-process lock without blocking the event loop; True if another process held it."""
+    waited = False
+    while True:
+        try:
+            lock.acquire(timeout=0)
+            return waited
+        except Timeout:
+            if not waited:
+                logger.info(f"Generation for {ai_request_id} is running in another process, waiting for it...")
+            waited = True
+            await asyncio.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+
+
+async def _lead(ai_request_id: UUID, run):
+    os.makedirs(os.path.dirname(lock_path(ai_request_id)), exist_ok=True)
+    lock = FileLock(lock_path(ai_request_id))
+    started = time.time()
+    waited = await _acquire(lock, ai_request_id)
+    try:
+        if waited:
+            result = _read_result(ai_request_id, started)
+            if result is not None:
+                logger.info(f"Reusing the result of the generation that finished for {ai_request_id}")
+                return result
+        result = await run()
+        _write_result(ai_request_id, result)
+        return result
+    finally:
+        lock.release()
+
+
+async def single_flight(ai_request_id: UUID, run):
+    """Run `run()` once per ai_request_id at a time, across tasks and worker processes.
+
+    Callers arriving while a generation is in flight get that generation's result (or error)
+    instead of starting their own.
+    """
+    key = str(ai_request_id)
+    inflight = _inflight.get(key)
+    if inflight is not None:
+        logger.info(f"Attaching to the generation in flight for {ai_request_id}")
+        return await asyncio.shield(inflight)
+    task = asyncio.ensure_future(_lead(ai_request_id, run))
+    _inflight[key] = task
+    try:
+        return await asyncio.shield(task)
+    finally:
+        if task.done():
+            _inflight.pop(key, None)
+        else:
+            task.add_done_callback(lambda _: _inflight.pop(key, None))
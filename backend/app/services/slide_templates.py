@@ -0,0 +1,127 @@
+import os
+import re
+import hashlib
+import logging
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from jinja2 import Environment, FileSystemLoader
+from app.services.compressed_assets import write_variants
+from app.services.memory_cache import served_files
+from app.services.code_highlighting import highlight_code
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES_DIR = os.path.join(APP_DIR, "templates")
+STATIC_DIR = os.path.join(APP_DIR, "static", "slides")
+ASSET_ROUTE = "/static/slides"
+# Where learners' browsers fetch slide stylesheets from; slide HTML is shown outside the API's origin
+SLIDE_ASSET_BASE_URL = os.getenv("SLIDE_ASSET_BASE_URL", "http://localhost:8000").rstrip("/")
+
+FINGERPRINTED_NAME = re.compile(r"^(?P<stem>[\w-]+)\.(?P<fingerprint>[0-9a-f]{12})(?P<ext>\.\w+)$")
+ASSET_URL = re.compile(re.escape(f"{SLIDE_ASSET_BASE_URL}{ASSET_ROUTE}/") + r"(?P<name>[\w.-]+)")
+DEFAULT_CODE = "<pre><code>// Code indisponible</code></pre>"
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SlideTheme:
+    name: str
+    code_label: str = "Code"
+    code_lang: Optional[str] = None
+
+    @property
+    def stylesheet(self) -> str:
+        return f"{self.name}.css"
+
+
+THEMES = {
+    # Slides rendered into course videos by content_service
+    "default": SlideTheme(name="default"),
+    # Slides of the legacy /slides pipeline
+    "gradient": SlideTheme(name="gradient", code_label="Code Java", code_lang="Java"),
+}
+
+# Templates are compiled on first use and never reloaded for the life of the process
+environment = Environment(loader=FileSystemLoader(TEMPLATES_DIR), autoescape=False, auto_reload=False,
+                          keep_trailing_newline=True)
+
+
+@lru_cache(maxsize=None)
+def slide_template():
+    return environment.get_template("slide.html.j2")
+
+
+@lru_cache(maxsize=None)
+def asset_fingerprint(file_name: str) -> str:
+    with open(os.path.join(STATIC_DIR, file_name), 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def asset_url(file_name: str) -> str:
+    stem, ext = os.path.splitext(file_name)
+    return f"{SLIDE_ASSET_BASE_URL}{ASSET_ROUTE}/{stem}.{asset_fingerprint(file_name)}{ext}"
+
+
+def resolve_asset(name: str) -> Optional[str]:
+    """Local path of a fingerprinted asset name, or None if there is no such asset.
+
+    Any fingerprint resolves to the current file: slides generated before a stylesheet changed keep
+    linking their old fingerprint and must still render styled.
+    """
+    match = FINGERPRINTED_NAME.match(name)
+    if not match:
+        return None
+    file_name = f"{match['stem']}{match['ext']}"
+    if not os.path.exists(os.path.join(STATIC_DIR, file_name)):
+        return None
+    return os.path.join(STATIC_DIR, file_name)
+
+
+def is_current_asset(name: str) -> bool:
+    match = FINGERPRINTED_NAME.match(name)
+    return bool(match) and asset_fingerprint(f"{match['stem']}{match['ext']}") == match["fingerprint"]
+
+
+def render_slide(slide: dict, theme: str = "default") -> str:
+    slide_theme = THEMES[theme]
+    return slide_template().render(slide=slide, theme=slide_theme, stylesheet_url=asset_url(slide_theme.stylesheet),
+                                   code=highlight_code(slide.get('example_code') or DEFAULT_CODE))
+
+
+def write_slide_files(files: list):
+    """Write a batch of (path, html) slide files, then refresh their served and precompressed copies."""
+    for path, html in files:
+        with open(path, 'w', encoding='utf-8') as html_file:
+            html_file.write(html)
+    for path, _ in files:
+        served_files.invalidate(str(path))
+        write_variants(str(path))
+
+
+def localize_assets(html: str) -> str:
+    """Point stylesheet links at the files on disk, so a capture doesn't depend on the API being up."""
+    def local_uri(match):
+        path = resolve_asset(match["name"])
+        return Path(path).as_uri() if path else match[0]
+    return ASSET_URL.sub(local_uri, html)
+
+
+@contextmanager
+def capture_copy(html_path: str):
+    """Yield the HTML file a browser should open to capture html_path."""
+    with open(html_path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    local_html = localize_assets(html)
+    if local_html == html:
+        yield html_path
+        return
+    capture_path = f"{os.path.splitext(html_path)[0]}.capture.html"
+    with open(capture_path, 'w', encoding='utf-8') as f:
+        f.write(local_html)
+    try:
+        yield capture_path
+    finally:
+        os.remove(capture_path)
@@ -1,14 +1,16 @@
 import json
+import asyncio
 from pathlib import Path
 import subprocess
 import edge_tts
 import os
 import httpx
-from selenium import webdriver
 from PIL import Image
-import time
 
 from app.schemas.courseRequest import CourseRequest
+from app.services.browser_pool import browser_pool
+from app.services.compressed_assets import write_manifest_variants
+from app.services.slide_templates import capture_copy, render_slide, write_slide_files
 
 
 #async def receive_content(payload : CourseRequest):
@@ -53,6 +55,7 @@ async def generate_content(course_id: int,language, response):
     count = count_slides(slides)
 
     generate_video(count,course_id)
+    write_manifest_variants(course_id)
 
     return {
         "slides": slides,
@@ -133,6 +136,7 @@ async def generate_slides(slides, path: str):
     print(f"Created output directory: {output_dir}")
 
     generated_files = []
+    files = []
 
     print(f"Processing slides: {slides}")
     for slide in slides:
@@ -148,11 +152,7 @@ async def generate_slides(slides, path: str):
 
         filename = f"slide{slide_id}.html"
         filepath = output_dir / filename
-        print(f"Writing to file: {filepath}")
-
-        with open(filepath, 'w', encoding='utf-8') as html_file:
-            html_file.write(html_content)
-        print(f"File written successfully: {filepath}")
+        files.append((filepath, html_content))
 
         generated_files.append({
             "slide_id": slide_id,
@@ -160,6 +160,10 @@ async def generate_slides(slides, path: str):
         })
         print(f"Added to generated_files, current count: {len(generated_files)}")
 
+    # Toutes les slides sont écrites en un seul lot, hors de la boucle d'événements
+    await asyncio.to_thread(write_slide_files, files)
+    print(f"Wrote {len(files)} slide files to {output_dir}")
+
     print(f"Returning {len(generated_files)} generated files")
     return generated_files
 
@@ -171,348 +175,24 @@ def count_slides(slides):
 
 
 def generate_html_slide(slide_data):
-    html_template = f"""<!DOCTYPE html>
-<html lang="fr">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{slide_data.get('title', f"Slide {slide_data['id']}")}</title>
-    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/prism/1.29.0/themes/prism-tomorrow.min.css">
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/prism/1.29.0/components/prism-core.min.js"></script>
-    <script src="https://cdnjs.cloudflare.com/ajax/libs/prism/1.29.0/plugins/autoloader/prism-autoloader.min.js"></script>
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            line-height: 1.6;
-            color: #333;
-            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-            min-height: 100vh;
-            padding: 20px;
-        }}
-
-        .container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: white;
-            border-radius: 15px;
-            box-shadow: 0 20px 60px rgba(0, 0, 0, 0.1);
-            overflow: hidden;
-            animation: slideIn 0.6s ease-out;
-        }}
-
-        @keyframes slideIn {{
-            from {{
-                opacity: 0;
-                transform: translateY(30px);
-            }}
-            to {{
-                opacity: 1;
-                transform: translateY(0);
-            }}
-        }}
-
-        .header {{
-            background: linear-gradient(135deg, #2c3e50 0%, #3498db 100%);
-            color: white;
-            padding: 30px 40px;
-            text-align: center;
-            position: relative;
-            overflow: hidden;
-        }}
-
-        .header::before {{
-            content: '';
-            position: absolute;
-            top: 0;
-            left: 0;
-            right: 0;
-            bottom: 0;
-            background: url('data:image/svg+xml,<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><circle cx="50" cy="50" r="2" fill="rgba(255,255,255,0.1)"/></svg>') repeat;
-            opacity: 0.3;
-        }}
-
-        .slide-number {{
-            position: absolute;
-            top: 20px;
-            right: 30px;
-            background: rgba(255, 255, 255, 0.2);
-            padding: 8px 15px;
-            border-radius: 20px;
-            font-size: 14px;
-            font-weight: 500;
-        }}
-
-        .title {{
-            font-size: 2.5em;
-            font-weight: 700;
-            margin-bottom: 10px;
-            position: relative;
-            z-index: 1;
-        }}
-
-
-        .content {{
-            padding: 40px;
-        }}
-
-        .summary {{
-            background: linear-gradient(135deg, #f8f9fa 0%, #e9ecef 100%);
-            border-left: 5px solid #3498db;
-            padding: 25px;
-            margin-bottom: 30px;
-            border-radius: 10px;
-            box-shadow: 0 5px 15px rgba(0, 0, 0, 0.08);
-        }}
-
-        .summary h2 {{
-            color: #2c3e50;
-            font-size: 1.4em;
-            margin-bottom: 20px;
-            display: flex;
-            align-items: center;
-        }}
-
-        .summary h2::before {{
-            content: "📚";
-            margin-right: 10px;
-            font-size: 1.2em;
-        }}
-
-        .summary ul {{
-            list-style: none;
-            padding-left: 0;
-        }}
-
-        .summary li {{
-            margin: 15px 0;
-            padding: 12px 0;
-            border-bottom: 1px solid #dee2e6;
-            position: relative;
-            padding-left: 25px;
-        }}
-
-        .summary li::before {{
-            content: "▶";
-            position: absolute;
-            left: 0;
-            color: #3498db;
-            font-size: 0.8em;
-        }}
-
-        .summary li:last-child {{
-            border-bottom: none;
-        }}
-
-        .summary strong {{
-            color: #2c3e50;
-            font-weight: 600;
-        }}
-
-        .code-section {{
-            background: #1e1e1e;
-            border-radius: 10px;
-            overflow: hidden;
-            box-shadow: 0 10px 30px rgba(0, 0, 0, 0.2);
-            margin-top: 30px;
-        }}
-
-        .code-header {{
-            background: linear-gradient(135deg, #FF6B6B 0%, #4ECDC4 100%);
-            color: white;
-            padding: 15px 25px;
-            font-weight: 600;
-            display: flex;
-            align-items: center;
-            justify-content: space-between;
-        }}
-
-        .code-header::before {{
-            content: "☕";
-            margin-right: 10px;
-            font-size: 1.2em;
-        }}
-
-        .code-lang {{
-            background: rgba(255, 255, 255, 0.2);
-            padding: 4px 12px;
-            border-radius: 15px;
-            font-size: 0.9em;
-        }}
-
-        .code-content {{
-            padding: 0;
-        }}
-
-        .code-content pre {{
-            margin: 0;
-            padding: 25px;
-            background: #1e1e1e;
-            color: #f8f8f2;
-            font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
-            font-size: 14px;
-            line-height: 1.5;
-            overflow-x: auto;
-        }}
-
-        .code-content pre code {{
-            background: none;
-            padding: 0;
-            border-radius: 0;
-        }}
-
-        .navigation {{
-            background: #f8f9fa;
-            padding: 20px 40px;
-            border-top: 1px solid #dee2e6;
-            display: flex;
-            justify-content: space-between;
-            align-items: center;
-        }}
-
-        .nav-button {{
-            background: linear-gradient(135deg, #3498db 0%, #2980b9 100%);
-            color: white;
-            border: none;
-            padding: 12px 20px;
-            border-radius: 25px;
-            cursor: pointer;
-            font-weight: 500;
-            transition: all 0.3s ease;
-            text-decoration: none;
-            display: inline-flex;
-            align-items: center;
-            gap: 8px;
-        }}
-
-        .nav-button:hover {{
-            transform: translateY(-2px);
-            box-shadow: 0 5px 15px rgba(52, 152, 219, 0.4);
-        }}
-
-        .nav-button:disabled {{
-            background: #bdc3c7;
-            cursor: not-allowed;
-            transform: none;
-            box-shadow: none;
-        }}
-
-        .slide-indicator {{
-            background: #e9ecef;
-            border-radius: 15px;
-            padding: 8px 16px;
-            color: #6c757d;
-            font-size: 0.9em;
-            font-weight: 500;
-        }}
-
-        .unavailable {{
-            color: #e74c3c;
-            font-style: italic;
-            text-align: center;
-            padding: 20px;
-            background: #fdf2f2;
-            border-radius: 8px;
-            border: 1px solid #f5c6cb;
-        }}
-
-        @media (max-width: 768px) {{
-            .container {{
-                margin: 10px;
-                border-radius: 10px;
-            }}
-
-            .header {{
-                padding: 20px;
-            }}
-
-            .title {{
-                font-size: 2em;
-            }}
-
-            .content {{
-                padding: 20px;
-            }}
-
-            .navigation {{
-                padding: 15px 20px;
-                flex-direction: column;
-                gap: 15px;
-            }}
-
-            .nav-button {{
-                width: 100%;
-                justify-content: center;
-            }}
-        }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <div class="slide-number">Slide {slide_data['id']}</div>
-        </div>
-
-        <div class="content">
-            <div class="summary">
-                <h2>Résumé</h2>
-                {slide_data.get('summary', 'Résumé indisponible')}
-            </div>
-
-            <div class="code-section">
-                <div class="code-header">
-                    <span>Code Java</span>
-                    <span class="code-lang">Java</span>
-                </div>
-                <div class="code-content">
-                    {slide_data.get('example_code', '<pre><code>// Code indisponible</code></pre>')}
-                </div>
-            </div>
-        </div>
-    </div>
-</body>
-</html>"""
-    return html_template
+    return render_slide(slide_data, theme="gradient")
 
 
 def capture_slide(html_path: str, output_png: str):
-    """Capture une slide HTML en image PNG"""
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--window-size=1920,1080')  # Dimensions paires standard
-    options.add_argument('--disable-gpu')
-    options.add_argument('--disable-software-rasterizer')  # Éviter les erreurs GPU
-    options.add_argument('--disable-background-timer-throttling')
-    options.add_argument('--disable-renderer-backgrounding')
-    options.add_argument('--disable-backgrounding-occluded-windows')
-
-    driver = None
-    try:
-        driver = webdriver.Chrome(options=options)
-        # Utiliser un chemin absolu pour éviter les problèmes
-        abs_path = os.path.abspath(html_path)
-        driver.get(f"file://{abs_path}")
-        time.sleep(3)  # Augmenter le délai pour permettre le chargement complet
-
-        # S'assurer que la fenêtre a la bonne taille
-        driver.set_window_size(1920, 1080)
-        time.sleep(1)  # Petit délai supplémentaire après le redimensionnement
-
-        driver.save_screenshot(output_png)
-        print(f"Screenshot saved: {output_png}")
-    except Exception as e:
-        print(f"Error capturing slide {html_path}: {e}")
-        raise
-    finally:
-        if driver:
-            driver.quit()
+    """Capture une slide HTML en image PNG avec un navigateur du pool"""
+    with browser_pool.browser() as browser:
+        try:
+            # Copie locale dont la feuille de style pointe sur le disque, chemin absolu pour éviter les problèmes
+            with capture_copy(html_path) as local_html:
+                browser.open(f"file://{os.path.abspath(local_html)}")
+                # Attendre que la slide soit chargée (polices comprises)
+                browser.wait_until_ready()
+
+                browser.driver.save_screenshot(output_png)
+            print(f"Screenshot saved: {output_png}")
+        except Exception as e:
+            print(f"Error capturing slide {html_path}: {e}")
+            raise
 
 
 def create_video_from_image_audio(image: str, audio: str, output: str):
@@ -0,0 +1,171 @@
+import os
+import json
+import asyncio
+import logging
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from uuid import UUID
+import httpx
+from app.schemas.courseRequest import CourseRequest
+from app.services.checkpoints import ClipManifest
+from app.services.compressed_assets import write_manifest_variants
+from app.services.content_service import (
+    VIDEO_PARALLEL, check_and_generate_video, concat_videos, default_video_workers, failed_slides_message,
+    normalize_slide_id, produce_slide_clip, render_slots, report_progress, run_with_events, save_model_response,
+    sorted_slide_ids, upload_video
+)
+from app.services.encoding_profiles import get_encoding_profile
+from app.services.file_cache import remove_stale
+from app.services.generation_control import check_cancelled
+from app.services.hls import VIDEO_HLS, HlsPlaylist
+from app.services.model_response_cache import MODEL_CACHE_ENABLED, clone_presentation, model_response_cache
+from app.services.single_flight import single_flight
+
+MODEL_STREAM_READ_TIMEOUT = float(os.getenv("MODEL_STREAM_READ_TIMEOUT", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+async def stream_model_response(payload: CourseRequest, ai_request_id: UUID, model_api_host: str = "localhost"):
+    """Yield the model service's NDJSON records as they arrive.
+
+    Each record carries a "slide" and/or a "speech" item (or whole "slides"/"speech" lists);
+    any other key (topic, level, ...) is course metadata.
+    """
+    timeout = httpx.Timeout(10.0, read=MODEL_STREAM_READ_TIMEOUT)
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        async with client.stream("POST", f"http://{model_api_host}:8001/generate/{ai_request_id}/stream",
+                                 json=payload.dict()) as model_response:
+            logger.info(f"Model API stream status: {model_response.status_code}")
+            if model_response.status_code != 200:
+                await model_response.aread()
+                raise Exception(f"Model API failed: {model_response.text}")
+            async for line in model_response.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+class SlidePipeline:
+    """Start each slide's HTML -> TTS -> capture -> encode chain as soon as its slide and speech have both arrived."""
+
+    def __init__(self, ai_request_id: UUID, language: str, executor: ThreadPoolExecutor, profile: str = None,
+                 progress=None):
+        self.ai_request_id = ai_request_id
+        self.executor = executor
+        self.language = language
+        self.profile = get_encoding_profile(profile)
+        self.progress = progress
+        self.manifest = ClipManifest(ai_request_id)
+        self.hls = HlsPlaylist(ai_request_id, self.profile) if VIDEO_HLS else None
+        self.response = {"slides": [], "speech": []}
+        self.slides = {}
+        self.speech = {}
+        self.tasks = {}
+        self.failures = []
+
+    def add(self, record: dict):
+        for key, value in record.items():
+            if key in ("slide", "slides", "speech"):
+                for item in value if isinstance(value, list) else [value]:
+                    self._add_item("speech" if key == "speech" else "slides", item)
+            else:
+                self.response[key] = value
+        self._raise_failures()
+        ready = (self.slides.keys() & self.speech.keys()) - self.tasks.keys()
+        for slide_id in sorted_slide_ids(ready):
+            logger.info(f"Slide {slide_id} complete in the model stream, starting its pipeline")
+            self.tasks[slide_id] = asyncio.ensure_future(self._produce(slide_id))
+
+    async def _produce(self, slide_id):
+        clip = await produce_slide_clip(self.ai_request_id, self.slides[slide_id], self.speech[slide_id], self.language,
+                                        self.profile, self.manifest, self.executor, self.progress, self.failures)
+        if self.hls:
+            await asyncio.to_thread(self.hls.add, slide_id, clip)
+        return clip
+
+    def _add_item(self, kind: str, item: dict):
+        if item.get("id") is None:
+            logger.warning(f"Skipping streamed {kind} item without ID: {item}")
+            return
+        self.response[kind].append(item)
+        # Speech ids may arrive as strings while slides are numbered as ints
+        (self.slides if kind == "slides" else self.speech)[normalize_slide_id(item["id"])] = item
+
+    def _raise_failures(self):
+        for task in self.tasks.values():
+            if task.done() and not task.cancelled() and task.exception():
+                raise task.exception()
+
+    async def finish(self) -> dict:
+        """Wait for every started slide; returns {slide_id: clip path or None}."""
+        for slide_id in sorted_slide_ids(self.slides.keys() - self.speech.keys()):
+            logger.warning(f"No speech streamed for slide {slide_id}, leaving it out of the video")
+        ids = sorted_slide_ids(self.tasks)
+        clips = await asyncio.gather(*(self.tasks[i] for i in ids))
+        if self.hls:
+            await asyncio.to_thread(self.hls.finish)
+        return dict(zip(ids, clips))
+
+    def cancel(self):
+        for task in self.tasks.values():
+            task.cancel()
+        self.manifest.remove_partials()
+
+
+async def stream_and_generate_video(ai_request_id: UUID, payload: CourseRequest, model_api_host: str = "localhost",
+                                    spring_boot_host: str = "localhost", profile: str = None, progress=None):
+    cached = model_response_cache.lookup(payload) if MODEL_CACHE_ENABLED else None
+    if cached:
+        logger.info(f"Reusing the model response generated for ai_request_id: {cached['ai_request_id']}")
+        await asyncio.to_thread(clone_presentation, cached["ai_request_id"], ai_request_id)
+        return await check_and_generate_video(ai_request_id, payload.language, cached["response"], spring_boot_host,
+                                              profile, progress=progress)
+    run = partial(_stream_and_upload, ai_request_id, payload, model_api_host, spring_boot_host, profile)
+    return await single_flight(ai_request_id, partial(run_with_events, ai_request_id, run, progress))
+
+
+async def _stream_and_upload(ai_request_id: UUID, payload: CourseRequest, model_api_host: str, spring_boot_host: str,
+                             profile: str, progress):
+    course_path = Path(f"presentations/{ai_request_id}")
+    course_path.mkdir(parents=True, exist_ok=True)
+    # Counted against RENDER_JOBS like any course render, with its own slide threads as in generate_video_overlapped
+    async with render_slots:
+        workers = default_video_workers() if VIDEO_PARALLEL else 1
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slide-render")
+        pipeline = SlidePipeline(ai_request_id, payload.language, executor, profile, progress)
+        try:
+            report_progress(progress, "slides")
+            async for record in stream_model_response(payload, ai_request_id, model_api_host):
+                check_cancelled(ai_request_id)
+                pipeline.add(record)
+            logger.info(f"Model stream finished for ai_request_id: {ai_request_id}, waiting for the remaining slides")
+            report_progress(progress, "rendering")
+            clips = await pipeline.finish()
+
+            videos = [clips[i] for i in sorted_slide_ids(clips) if clips[i]]
+            if not videos:
+                raise ValueError("No videos were generated")
+            check_cancelled(ai_request_id)
+            report_progress(progress, "encoding")
+            final_video = str(course_path / f"{ai_request_id}.mp4")
+            remove_stale(final_video)
+            await asyncio.get_running_loop().run_in_executor(executor, concat_videos, videos, final_video,
+                                                             ai_request_id)
+            report_progress(progress, "encoding", None, "concat")
+        except BaseException:
+            pipeline.cancel()
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+            raise
+        finally:
+            await asyncio.to_thread(executor.shutdown, True)
+
+    save_model_response(ai_request_id, payload.language, pipeline.response)
+    write_manifest_variants(ai_request_id)
+    if MODEL_CACHE_ENABLED:
+        model_response_cache.store(payload, ai_request_id, pipeline.response)
+    if pipeline.failures:
+        logger.warning(f"{failed_slides_message(pipeline.failures)} for ai_request_id: {ai_request_id}, "
+                       f"uploading the video without them")
+    uploaded = await upload_video(ai_request_id, payload.language, pipeline.response, spring_boot_host, progress)
+    return {**uploaded, "failed_slides": pipeline.failures}
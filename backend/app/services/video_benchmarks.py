@@ -0,0 +1,155 @@
+"""Benchmarks for the course video pipeline, run against an existing presentation.
+
+    python -m app.services.video_benchmarks assembly <ai_request_id> [runs]
+    python -m app.services.video_benchmarks profiles <ai_request_id> [profile ...]
+    python -m app.services.video_benchmarks stages <ai_request_id> [runs]
+"""
+import os
+import shutil
+import sys
+import time
+import asyncio
+import tempfile
+import logging
+from contextlib import contextmanager
+from uuid import uuid4
+from app.services import content_service
+from app.services.content_service import (
+    generate_video, capture_slide_image, create_video_from_image_audio, map_slides, load_model_response
+)
+from app.services.encoding_profiles import ENCODING_PROFILES
+from app.services.file_cache import caches
+
+logger = logging.getLogger(__name__)
+
+
+def _scratch_copy(ai_request_id: str) -> str:
+    """Copy a presentation's slides and audios under a throwaway id so the real video is untouched."""
+    source = f"presentations/{ai_request_id}"
+    scratch_id = f"bench-{uuid4()}"
+    for folder in ("slides", "audios"):
+        shutil.copytree(f"{source}/{folder}", f"presentations/{scratch_id}/{folder}")
+    return scratch_id
+
+
+def _count_slides(ai_request_id: str) -> int:
+    slides_dir = f"presentations/{ai_request_id}/slides"
+    return len([name for name in os.listdir(slides_dir) if name.endswith(".html")])
+
+
+def benchmark_assembly(ai_request_id: str, runs: int = 1) -> dict:
+    """Time each assembly mode; every run starts with empty caches so neither mode reuses the other's captures."""
+    nbr_slides = _count_slides(ai_request_id)
+    results = {}
+    for assembly in ("concat", "single_pass"):
+        timings = []
+        size = 0
+        for _ in range(runs):
+            scratch_id = _scratch_copy(ai_request_id)
+            try:
+                with _cold_caches():
+                    started = time.perf_counter()
+                    video = generate_video(nbr_slides, scratch_id, assembly=assembly)
+                    timings.append(time.perf_counter() - started)
+                    size = os.path.getsize(video)
+            finally:
+                shutil.rmtree(f"presentations/{scratch_id}", ignore_errors=True)
+        results[assembly] = {"seconds": min(timings), "bytes": size}
+    return results
+
+
+def benchmark_profiles(ai_request_id: str, profiles: list = None) -> dict:
+    """Capture the course once, then encode every slide with each profile."""
+    nbr_slides = _count_slides(ai_request_id)
+    scratch_id = _scratch_copy(ai_request_id)
+    results = {}
+    try:
+        frames = map_slides(capture_slide_image, range(1, nbr_slides + 1), scratch_id, parallel=True)
+        frames = [frame for _, frame in sorted(frames.items()) if frame]
+        for name in profiles or list(ENCODING_PROFILES):
+            profile = ENCODING_PROFILES[name]
+            elapsed = 0.0
+            size = 0
+            for k, (image, audio) in enumerate(frames):
+                clip = f"presentations/{scratch_id}/{name}-{k}.mp4"
+                started = time.perf_counter()
+                create_video_from_image_audio(image, audio, clip, profile)
+                elapsed += time.perf_counter() - started
+                size += os.path.getsize(clip)
+                os.remove(clip)
+            results[name] = {"seconds": elapsed, "bytes": size}
+    finally:
+        shutil.rmtree(f"presentations/{scratch_id}", ignore_errors=True)
+    return results
+
+
+@contextmanager
+def _cold_caches():
+    """Point every content cache at an empty directory so each run does the full work."""
+    scratch = tempfile.mkdtemp(prefix="bench-cache-")
+    directories = {name: cache.directory for name, cache in caches.items()}
+    try:
+        for name, cache in caches.items():
+            cache.directory = os.path.join(scratch, name)
+        yield
+    finally:
+        for name, cache in caches.items():
+            cache.directory = directories[name]
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def benchmark_stages(ai_request_id: str, runs: int = 1) -> dict:
+    """Regenerate the course from its stored model response with sequential and with overlapping stages."""
+    stored = load_model_response(ai_request_id)
+    if not stored:
+        raise FileNotFoundError(f"No model_response.json for {ai_request_id}")
+
+    async def run_all():
+        results = {}
+        for name, overlap in (("sequential", False), ("overlapped", True)):
+            content_service.STAGE_OVERLAP = overlap
+            timings = []
+            size = 0
+            for _ in range(runs):
+                scratch_id = f"bench-{uuid4()}"
+                try:
+                    with _cold_caches():
+                        started = time.perf_counter()
+                        result = await content_service.generate_content(scratch_id, stored["language"], stored["response"])
+                        timings.append(time.perf_counter() - started)
+                    size = os.path.getsize(result["video"])
+                finally:
+                    shutil.rmtree(f"presentations/{scratch_id}", ignore_errors=True)
+            results[name] = {"seconds": min(timings), "bytes": size}
+        return results
+
+    overlap = content_service.STAGE_OVERLAP
+    try:
+        return asyncio.run(run_all())
+    finally:
+        content_service.STAGE_OVERLAP = overlap
+
+
+def print_results(title: str, results: dict):
+    print(title)
+    print(f"{'name':<20}{'seconds':>10}{'size (KB)':>12}")
+    for name, result in results.items():
+        print(f"{name:<20}{result['seconds']:>10.2f}{result['bytes'] / 1024:>12.0f}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    if len(sys.argv) < 3 or sys.argv[1] not in ("assembly", "profiles", "stages"):
+        print(__doc__)
+        sys.exit(1)
+    if sys.argv[1] == "assembly":
+        runs = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+        print_results(f"Assembly benchmark for {sys.argv[2]} ({runs} run(s), best time, cold caches)",
+                      benchmark_assembly(sys.argv[2], runs))
+    elif sys.argv[1] == "stages":
+        runs = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+        print_results(f"Stage overlap benchmark for {sys.argv[2]} ({runs} run(s), best time, cold caches)",
+                      benchmark_stages(sys.argv[2], runs))
+    else:
+        print_results(f"Encoding profiles for {sys.argv[2]} (sequential encode time, total size)",
+                      benchmark_profiles(sys.argv[2], sys.argv[3:] or None))
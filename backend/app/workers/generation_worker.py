@@ -0,0 +1,74 @@
+"""Presentation generation worker, run next to the API as its own process:
+
+    python -m app.workers.generation_worker
+
+Each worker process handles one job at a time; start more processes to raise throughput.
+"""
+import asyncio
+import os
+import logging
+from datetime import datetime
+from uuid import UUID
+from app.configs.db import SessionLocal, init_db
+from app.models.generation_job import GenerationJob, JobStatus
+from app.services.browser_pool import browser_pool
+from app.services.content_service import check_and_generate_video, failed_slides_message
+from app.services.generation_control import GenerationCancelled
+from app.services.generation_job_service import claim_next_job, update_job, job_progress_callback
+
+GENERATION_WORKER_POLL_SECONDS = float(os.getenv("GENERATION_WORKER_POLL_SECONDS", "2"))
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def run_job(job: GenerationJob):
+    logger.info(f"Running generation job {job.id} for ai_request_id: {job.ai_request_id} (attempt {job.attempts})")
+    progress = job_progress_callback(job.id)
+    try:
+        try:
+            result = await check_and_generate_video(
+                UUID(job.ai_request_id),
+                job.language,
+                job.response,
+                job.spring_boot_host,
+                job.profile,
+                job.incremental,
+                progress=progress,
+            )
+        finally:
+            # A step update landing after the final status would move the job back to an active one
+            await asyncio.to_thread(progress.close)
+        # Slides whose audio failed are left out of the video; the job still completes but says which ones
+        failures = result.get("failed_slides") or []
+        error = failed_slides_message(failures) if failures else None
+        update_job(job.id, status=JobStatus.DONE, result=result, error=error, finished_at=datetime.utcnow())
+        logger.info(f"Generation job {job.id} done" + (f" ({error})" if error else ""))
+    except GenerationCancelled as e:
+        logger.info(f"Generation job {job.id} cancelled")
+        update_job(job.id, status=JobStatus.CANCELLED, error=str(e), finished_at=datetime.utcnow())
+    except Exception as e:
+        logger.error(f"Generation job {job.id} failed: {e}")
+        update_job(job.id, status=JobStatus.FAILED, error=str(e), finished_at=datetime.utcnow())
+
+async def run_worker():
+    init_db()
+    try:
+        browser_pool.start()
+    except Exception as e:
+        logger.warning(f"Could not warm up the browser pool: {e}")
+    try:
+        while True:
+            db = SessionLocal()
+            try:
+                job = claim_next_job(db)
+            finally:
+                db.close()
+            if job is None:
+                await asyncio.sleep(GENERATION_WORKER_POLL_SECONDS)
+                continue
+            await run_job(job)
+    finally:
+        browser_pool.shutdown()
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
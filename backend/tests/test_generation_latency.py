@@ -0,0 +1,109 @@
+"""The API keeps answering while a course video renders (user-010).
+
+    cd backend && python -m pytest tests
+"""
+import time
+import asyncio
+import threading
+from uuid import uuid4
+import httpx
+import pytest
+from fastapi import FastAPI
+from app.routers import presentations
+from app.services import content_service
+
+RENDER_SECONDS = 2.0
+# A blocked event loop would hold each ping for the rest of the render
+MAX_PING_SECONDS = 0.5
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(params=[True, False], ids=["overlapped", "sequential"])
+def render_started(request, monkeypatch, tmp_path):
+    """Stub the pipeline around render stages that block their thread like ffmpeg and Selenium do.
+
+    With STAGE_OVERLAP (the default) the real generate_video_overlapped drives stubbed capture, encode
+    and concat steps; without it generate_video itself is the blocking step.
+    """
+    monkeypatch.chdir(tmp_path)
+    started = threading.Event()
+
+    def block(result):
+        started.set()
+        time.sleep(RENDER_SECONDS)
+        return result
+
+    def generate_video(slides, ai_request_id, **kwargs):
+        return block(f"presentations/{ai_request_id}/{ai_request_id}.mp4")
+
+    def capture_slide_frame(i, ai_request_id, *args):
+        return block(f"presentations/{ai_request_id}/slide{i}.png")
+
+    def finish_slide_clip(i, ai_request_id, *args):
+        return block(f"presentations/{ai_request_id}/clips/slide{i}.mp4")
+
+    def start_audio(speech, language, path, progress=None):
+        audio = asyncio.get_running_loop().create_future()
+        audio.set_result(f"{path}/audio1.mp3")
+        return {1: audio}
+
+    async def generate_slides(slides, path, progress=None):
+        return [{"slide_id": 1, "html_file": f"{path}/slide1.html"}]
+
+    async def no_files(*args, **kwargs):
+        return []
+
+    async def upload_video(ai_request_id, *args, **kwargs):
+        return {"video": f"presentations/{ai_request_id}/{ai_request_id}.mp4"}
+
+    monkeypatch.setattr(content_service, "STAGE_OVERLAP", request.param)
+    monkeypatch.setattr(content_service, "generate_slides", generate_slides)
+    monkeypatch.setattr(content_service, "start_audio", start_audio)
+    monkeypatch.setattr(content_service, "create_audio", no_files)
+    monkeypatch.setattr(content_service, "generate_video", generate_video)
+    monkeypatch.setattr(content_service, "capture_slide_frame", capture_slide_frame)
+    monkeypatch.setattr(content_service, "finish_slide_clip", finish_slide_clip)
+    monkeypatch.setattr(content_service, "concat_videos", lambda *args: block(None))
+    monkeypatch.setattr(content_service, "save_model_response", lambda *args: None)
+    monkeypatch.setattr(content_service, "write_manifest_variants", lambda *args: None)
+    monkeypatch.setattr(content_service, "upload_video", upload_video)
+    return started
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+    app.include_router(presentations.router)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+    return app
+
+
+@pytest.mark.anyio
+async def test_api_latency_stays_flat_during_generation(app, render_started):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as client:
+        generation = asyncio.create_task(
+            client.post(f"/api/presentations/{uuid4()}/en/generate/process", json={"slides": [], "speech": []})
+        )
+        while not render_started.is_set():
+            await asyncio.sleep(0.01)
+
+        latencies = []
+        for _ in range(10):
+            started = time.perf_counter()
+            response = await client.get("/ping")
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200
+        rendering = not generation.done()
+
+        response = await generation
+    assert response.status_code == 200, response.text
+    assert rendering, "the render finished before the API was measured"
+    assert max(latencies) < MAX_PING_SECONDS, latencies